@@ -0,0 +1,142 @@
+import numpy as np
+
+
+def population_diversity(population):
+    """
+        Różnorodność zwartej populacji (n, c, 3): średnia po kursach części różnych przypisań (t, r, ts)
+        w populacji, przeskalowana do [0, 1] (0 - wszystkie osobniki identyczne, 1 - każdy osobnik
+        przypisuje każdy kurs inaczej).
+    """
+    n = population.shape[0]
+    if n < 2:
+        return 0.0
+    p = population.astype(np.int64) + 1
+    codes = (p[:, :, 0] * (p[:, :, 1].max() + 1) + p[:, :, 1]) * (p[:, :, 2].max() + 1) + p[:, :, 2]
+    codes.sort(axis=0)
+    distinct = 1 + (np.diff(codes, axis=0) != 0).sum(axis=0)
+    return float(((distinct - 1) / (n - 1)).mean())
+
+
+def credit_improvements(moves, values_before, values_after):
+    """
+        Przypisanie poprawy funkcji celu osobników operatorom: poprawa osobnika (tylko dodatnia część
+        values_before - values_after) dzielona jest między operatory proporcjonalnie do liczby ruchów
+        wykonanych przez każdy z nich na tym osobniku. moves - tablica (n, liczba operatorów).
+        Zwraca wektor sumarycznej poprawy na operator.
+    """
+    gain = np.maximum(np.asarray(values_before) - np.asarray(values_after), 0.0)
+    total = moves.sum(axis=1)
+    share = moves / np.maximum(total, 1)[:, np.newaxis]
+    return (share * gain[:, np.newaxis]).sum(axis=0)
+
+
+class AdaptiveMutation:
+    """
+        Adaptacyjny dobór mutacji na podstawie statystyk z przebiegu.
+        - Udziały operatorów na poziomie kursów (mutation.py) dobierane są metodą dopasowania
+          prawdopodobieństw (probability matching): jakość operatora to wygładzona wykładniczo poprawa
+          funkcji celu przypadająca na sekundę czasu procesora, a udział operatora to min_share plus
+          część pozostałej masy proporcjonalna do jakości.
+        - Łączna intensywność mutacji (mutation_rate zamiany okien czasowych i suma współczynników
+          operatorów) mnożona jest przez boost, gdy różnorodność populacji spada poniżej
+          diversity_threshold, i wraca (dzieląc przez boost) do wartości początkowej, gdy różnorodność
+          jest wystarczająca; mnożnik ograniczony jest przez max_boost.
+        Decyzje i statystyki każdej generacji zapisywane są w self.log.
+    """
+
+    def __init__(self, mutation_rate, rates, min_share=0.05, smoothing=0.3, diversity_threshold=0.05,
+                 boost=1.5, max_boost=4.0):
+        if not rates:
+            raise ValueError("Adaptacja mutacji wymaga co najmniej jednego operatora w rates.")
+        self.names = list(rates)
+        self.base_mutation_rate = mutation_rate
+        self.base_total = float(sum(rates.values()))
+        self.shares = np.array([rates[name] for name in self.names], dtype=float) / self.base_total
+        self.min_share = min(min_share, 1.0 / len(self.names))
+        self.smoothing = smoothing
+        self.diversity_threshold = diversity_threshold
+        self.boost = boost
+        self.max_boost = max_boost
+        self.factor = 1.0
+        self.quality = np.zeros(len(self.names))
+        self.log = []
+
+    def restore(self, log):
+        """
+            Odtworzenie stanu (udziałów, jakości operatorów i mnożnika) z dziennika zapisanego
+            w punkcie kontrolnym.
+        """
+        self.log = list(log)
+        if self.log and list(self.log[-1]['operators']) == self.names:
+            last = self.log[-1]
+            self.factor = last['factor']
+            self.quality = np.array([last['operators'][name]['quality'] for name in self.names])
+            self.shares = np.array([last['operators'][name]['share'] for name in self.names])
+
+    @property
+    def mutation_rate(self):
+        """
+            Bieżące prawdopodobieństwo zamiany okien czasowych (mutate_swap_timeslots).
+        """
+        return min(1.0, self.base_mutation_rate * self.factor)
+
+    def rates(self):
+        """
+            Bieżące współczynniki operatorów dla mutation.mutate_courses.
+        """
+        return dict(zip(self.names, (self.shares * self.base_total * self.factor).tolist()))
+
+    def update(self, generation, diversity, stats, moves, values_before, values_after, timeslot_stats=None):
+        """
+            Aktualizacja udziałów operatorów i intensywności mutacji po generacji.
+            stats, moves - wynik mutation.mutate_courses; values_before, values_after - wartości funkcji celu
+            dzieci przed i po mutacji; timeslot_stats - (liczba zamian, czas procesora [s], maska zmutowanych
+            dzieci) mutate_swap_timeslots. Zamiany okien czasowych traktowane są przy podziale poprawy jak
+            dodatkowy operator, aby ich efekt nie był przypisywany operatorom na poziomie kursów.
+            Zwraca wpis dziennika tej generacji.
+        """
+        moves = np.asarray(moves, dtype=float)
+        if timeslot_stats is not None:
+            moves = np.column_stack([moves, timeslot_stats[2]])
+        improvement = credit_improvements(moves, values_before, values_after)
+        cpu_times = np.array([stats[name][2] for name in self.names])
+
+        # jakość: poprawa na sekundę procesora, tylko dla operatorów wywołanych w tej generacji
+        called = np.array([stats[name][0] > 0 for name in self.names])
+        efficiency = improvement[:len(self.names)] / np.maximum(cpu_times, 1e-6)
+        self.quality[called] += self.smoothing * (efficiency[called] - self.quality[called])
+        if self.quality.sum() > 0:
+            free = 1.0 - self.min_share * len(self.names)
+            self.shares = self.min_share + free * self.quality / self.quality.sum()
+
+        if diversity < self.diversity_threshold:
+            self.factor = min(self.max_boost, self.factor * self.boost)
+        else:
+            self.factor = max(1.0, self.factor / self.boost)
+
+        entry = {
+            'generation': generation,
+            'diversity': diversity,
+            'factor': self.factor,
+            'mutation_rate': self.mutation_rate,
+            'rates': self.rates(),
+            'operators': {
+                name: {
+                    'calls': stats[name][0],
+                    'moves': stats[name][1],
+                    'cpu_time': stats[name][2],
+                    'improvement': float(improvement[k]),
+                    'quality': float(self.quality[k]),
+                    'share': float(self.shares[k]),
+                }
+                for k, name in enumerate(self.names)
+            },
+        }
+        if timeslot_stats is not None:
+            entry['timeslots'] = {
+                'moves': int(timeslot_stats[0]),
+                'cpu_time': timeslot_stats[1],
+                'improvement': float(improvement[-1]),
+            }
+        self.log.append(entry)
+        return entry
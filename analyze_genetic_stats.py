@@ -53,6 +53,31 @@ def analyze_computing_times(computing_times):
     print()
 
 
+def phase_matrix(phase_times, key='wall'):
+    phases = []
+    for entry in phase_times:
+        for name in entry:
+            if name not in phases:
+                phases.append(name)
+    values = np.array([[entry.get(name, {}).get(key) or 0.0 for name in phases] for entry in phase_times])
+    return phases, values.reshape(len(phase_times), len(phases))
+
+
+def analyze_phase_times(phase_times):
+    phases, wall = phase_matrix(phase_times, 'wall')
+    _, cpu = phase_matrix(phase_times, 'cpu')
+    _, memory = phase_matrix(phase_times, 'peak_memory')
+    total = wall.sum()
+    print("Statystyki czasu faz algorytmu (czas rzeczywisty / czas procesora):")
+    for k, name in enumerate(phases):
+        print(f" - {name}: {wall[:, k].sum():.2f} / {cpu[:, k].sum():.2f} sekund "
+              f"({100 * wall[:, k].sum() / max(total, 1e-12):.1f}% czasu), "
+              f"średnio {wall[:, k].mean():.4f} sekund na generację")
+        if memory[:, k].any():
+            print(f"   szczytowe zużycie pamięci: {memory[:, k].max() / 2 ** 20:.1f} MB")
+    print()
+
+
 def plot_fitness_chart(data, title="", x_label="", y_label="", image_path=None):
     plt.figure(figsize=(8, 4))
     plt.plot(data[0], linestyle='-', color='orange', label='średnia')
@@ -86,16 +111,37 @@ def plot_time_chart(data, title="", x_label="", y_label="", image_path=None):
         plt.show()
 
 
+def plot_phase_chart(phase_times, title="", x_label="", y_label="", image_path=None):
+    phases, wall = phase_matrix(phase_times, 'wall')
+    plt.figure(figsize=(8, 4))
+    plt.stackplot(np.arange(len(phase_times)), wall.T, labels=phases)
+    plt.title(title)
+    plt.xlabel(x_label)
+    plt.ylabel(y_label)
+    plt.grid(True)
+    plt.legend(loc='upper left', fontsize='small')
+    plt.tight_layout()
+    if image_path:
+        plt.savefig(image_path, dpi=300)
+        print(f"Wykres zapisany do {image_path}")
+    else:
+        plt.show()
+
+
 if __name__ == "__main__":
     input_dir = "output"
     fitness_history_file_path = input_dir + '/fitness_history.pkl'
     computing_times_file_path = input_dir + '/computing_times.pkl'
     fitness_history = load_pickle_file(fitness_history_file_path)
     computing_times = load_pickle_file(computing_times_file_path)
+    phase_times_file_path = input_dir + '/phase_times.pkl'
+    phase_times = load_pickle_file(phase_times_file_path) if os.path.exists(phase_times_file_path) else None
 
     try:
         analyze_fitness_history(fitness_history)
         analyze_computing_times(computing_times)
+        if phase_times:
+            analyze_phase_times(phase_times)
         output_dir = "charts"
         os.makedirs(output_dir, exist_ok=True)
         plot_fitness_chart(
@@ -116,6 +162,14 @@ if __name__ == "__main__":
             y_label="czas [s]",
             image_path=f"{output_dir}/times.png"
         )
+        if phase_times:
+            plot_phase_chart(
+                phase_times=phase_times,
+                title="Czas faz algorytmu",
+                x_label="generacja",
+                y_label="czas [s]",
+                image_path=f"{output_dir}/phase_times.png"
+            )
     except FileNotFoundError as e:
         print(f"File not found: {e.filename}")
     except Exception as e:
@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+import numpy as np
+import optimization
+from optimization import (open_json, create_instance, generate_population_satisfying_constraints, crossover_advanced,
+                          fix_unassigned_courses, mutate_swap_timeslots, compact_to_dense, parallel_fitness)
+
+
+TIME_SLOTS = 35
+
+
+def subset_course_data(course_data, fraction, seed=0):
+    """
+        Powtarzalny podzbiór kursów (losowanie bez zwracania z ustalonym ziarnem) zawierający
+        część fraction wszystkich kursów.
+    """
+    keys = sorted(course_data)
+    if fraction >= 1.0:
+        return dict(course_data)
+    chosen = random.Random(seed).sample(keys, max(1, round(fraction * len(keys))))
+    return {key: course_data[key] for key in sorted(chosen)}
+
+
+def measure(setup, fn, repeats=5):
+    """
+        Pomiar funkcji fn(*setup()): mediana czasu z repeats wywołań (każde na nowych danych z setup,
+        czas setup nie jest wliczany) oraz szczytowe zużycie pamięci (tracemalloc) w osobnym wywołaniu,
+        aby śledzenie alokacji nie zaburzało pomiaru czasu. tracemalloc obejmuje alokacje Pythona i numpy,
+        bez pamięci bibliotek natywnych (np. modelu OR-Tools w C++).
+    """
+    times = []
+    for _ in range(repeats):
+        args = setup()
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    args = setup()
+    tracemalloc.start()
+    try:
+        fn(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'median_time': statistics.median(times),
+        'min_time': min(times),
+        'max_time': max(times),
+        'repeats': repeats,
+        'peak_memory': peak,
+    }
+
+
+def benchmark_cases(instance, population_size=20, teacher_preferences=None, cp_model=True):
+    """
+        Lista przypadków (nazwa, setup, fn) dla jednej instancji. Populacja i gęsty osobnik
+        tworzone są raz, a setup zwraca ich kopie (operatory modyfikują dane w miejscu).
+    """
+    population = generate_population_satisfying_constraints(instance, population_size)
+    sol = compact_to_dense(population[0], instance.t, instance.r, instance.ts)
+    prefs = teacher_preferences or {}
+    g_c_mapping = instance.g_c_mapping
+
+    cases = [
+        ('generate_population_satisfying_constraints', lambda: (instance, population_size),
+         generate_population_satisfying_constraints),
+        ('crossover_advanced', lambda: (population.copy(), instance), crossover_advanced),
+        ('fix_unassigned_courses', lambda: (crossover_advanced(population.copy(), instance), instance),
+         fix_unassigned_courses),
+        ('mutate_swap_timeslots', lambda: (population.copy(), 0.5, instance.ts), mutate_swap_timeslots),
+    ]
+    # funkcje count_* z optimization.py: argumenty dobierane według nazwy parametrów
+    extra_args = {'g_c_mapping': g_c_mapping, 'teacher_preferences': prefs}
+    for name in sorted(dir(optimization)):
+        if not name.startswith('count_'):
+            continue
+        fn = getattr(optimization, name)
+        params = fn.__code__.co_varnames[1:fn.__code__.co_argcount]
+        args = (sol,) + tuple(extra_args[p] for p in params)
+        cases.append((name, lambda args=args: args, fn))
+    cases.append(('parallel_fitness',
+                  lambda: (sol, instance.c_t_mapping, instance.c_r_mapping, g_c_mapping, (3.0, 2.0, 1.0, 1.0, 0.3),
+                           teacher_preferences),
+                  parallel_fitness))
+    if cp_model:
+        from ortools_optimization import build_model, FORMULATIONS
+        for formulation in FORMULATIONS:
+            cases.append((f'cp_sat_build_model_{formulation}', lambda formulation=formulation: (instance, formulation),
+                          build_model))
+    return cases
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(course_data, rooms_data, fractions=(0.25, 0.5, 1.0), repeats=5, population_size=20,
+                   teacher_preferences=None, cp_max_courses=None, only=None, seed=0):
+    """
+        Uruchomienie wszystkich przypadków na podzbiorach kursów (fractions) pełnej instancji.
+        cp_max_courses - budowa modelu CP-SAT tylko dla instancji o co najwyżej tylu kursach (None - zawsze),
+        only - opcjonalna lista nazw przypadków do uruchomienia.
+        Zwraca słownik z metadanymi przebiegu i wynikami {instancja: {przypadek: pomiar}}.
+    """
+    results = {
+        'commit': git_commit(),
+        'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'repeats': repeats,
+        'population_size': population_size,
+        'instances': {},
+    }
+    for fraction in fractions:
+        random.seed(seed)
+        np.random.seed(seed)
+        instance = create_instance(subset_course_data(course_data, fraction, seed), rooms_data, TIME_SLOTS)
+        label = f'{fraction:g}'
+        print(f"--- instancja {label}: kursy {instance.c}, prowadzący {instance.t}, pokoje {instance.r} ---")
+        cp = cp_max_courses is None or instance.c <= cp_max_courses
+        measurements = {}
+        for name, setup, fn in benchmark_cases(instance, population_size, teacher_preferences, cp):
+            if only and name not in only:
+                continue
+            measurements[name] = measure(setup, fn, repeats)
+            print(f"{name}: mediana {measurements[name]['median_time']:.4f} s, "
+                  f"pamięć {measurements[name]['peak_memory'] / 2 ** 20:.1f} MB")
+        results['instances'][label] = {'courses': instance.c, 'teachers': instance.t, 'rooms': instance.r,
+                                       'results': measurements}
+    return results
+
+
+def compare_results(old, new, threshold=1.2):
+    """
+        Porównanie dwóch wyników run_benchmarks: wypisuje przypadki, których mediana czasu lub szczytowa
+        pamięć wzrosła więcej niż threshold razy. Zwraca listę regresji (instancja, przypadek, miara, iloraz).
+    """
+    regressions = []
+    for label, instance_new in new['instances'].items():
+        instance_old = old['instances'].get(label)
+        if instance_old is None:
+            continue
+        for name, m_new in instance_new['results'].items():
+            m_old = instance_old['results'].get(name)
+            if m_old is None:
+                continue
+            for key in ('median_time', 'peak_memory'):
+                if m_old[key] <= 0:
+                    continue
+                ratio = m_new[key] / m_old[key]
+                if ratio > threshold:
+                    regressions.append((label, name, key, ratio))
+                    print(f"regresja {label} {name} {key}: {m_old[key]:.4g} -> {m_new[key]:.4g} ({ratio:.2f}x)")
+    if not regressions:
+        print("Brak regresji.")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mikrobenchmarki operatorów algorytmu genetycznego i modelu CP-SAT.")
+    parser.add_argument('--fractions', type=float, nargs='+', default=[0.25, 0.5, 1.0],
+                        help="części kursów instancji Final_load_data")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--population-size', type=int, default=20)
+    parser.add_argument('--preferences', default='teacher_preferences2.json')
+    parser.add_argument('--cp-max-courses', type=int, default=None,
+                        help="budowa modelu CP-SAT tylko dla instancji o co najwyżej tylu kursach")
+    parser.add_argument('--only', nargs='+', default=None, help="nazwy przypadków do uruchomienia")
+    parser.add_argument('--output-dir', default='benchmarks')
+    parser.add_argument('--compare', default=None, help="plik JSON poprzedniego przebiegu do porównania")
+    args = parser.parse_args()
+
+    course_data = open_json("Final_load_data/merged_filtered_course_data.json")
+    rooms_type_mapping_data = open_json("Final_load_data/final_class_type_to_rooms.json")
+    teacher_preferences = open_json(args.preferences) if args.preferences else None
+
+    results = run_benchmarks(course_data, rooms_type_mapping_data, args.fractions, args.repeats,
+                             args.population_size, teacher_preferences, args.cp_max_courses, args.only)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = f"{args.output_dir}/benchmark_{results['commit'] or 'nocommit'}_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=4)
+    print(f"Wyniki zapisane do {path}")
+
+    if args.compare:
+        compare_results(open_json(args.compare), results)
@@ -0,0 +1,102 @@
+import os
+import pickle
+import queue
+import random
+import threading
+import numpy as np
+
+
+CHECKPOINT_FILE = 'checkpoint.pkl'
+
+
+class CheckpointWriter:
+    """
+        Zapis plików w osobnym wątku, aby pętla algorytmu nie czekała na kompresję i zapis na dysk.
+        Każdy plik zapisywany jest najpierw do pliku tymczasowego, a następnie podmieniany atomowo (os.replace).
+        Oczekujące (jeszcze nierozpoczęte) zlecenie zapisu pliku jest zastępowane nowszym zleceniem dla tej
+        samej ścieżki, dzięki czemu kolejka nie rośnie, gdy generacje są krótsze niż czas zapisu.
+    """
+
+    def __init__(self):
+        self.tasks = queue.Queue()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, path, write_fn):
+        """
+            Zlecenie zapisu: write_fn(plik) otrzymuje otwarty w trybie binarnym plik tymczasowy.
+            Przekazywane dane nie mogą być później modyfikowane (należy przekazywać kopie).
+        """
+        with self.lock:
+            queued = path in self.pending
+            self.pending[path] = write_fn
+        if not queued:
+            self.tasks.put(path)
+
+    def _run(self):
+        while True:
+            path = self.tasks.get()
+            if path is None:
+                self.tasks.task_done()
+                return
+            with self.lock:
+                write_fn = self.pending.pop(path)
+            tmp_path = f'{path}.tmp'
+            try:
+                with open(tmp_path, 'wb') as f:
+                    write_fn(f)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                print(f"Nie udało się zapisać pliku {path}: {e}")
+            finally:
+                self.tasks.task_done()
+
+    def flush(self):
+        """
+            Oczekiwanie na zakończenie wszystkich zleconych zapisów.
+        """
+        self.tasks.join()
+
+    def close(self):
+        self.tasks.put(None)
+        self.thread.join()
+
+
+def write_pickle(writer, path, obj):
+    writer.write(path, lambda f: pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def checkpoint_state(generation, population, best_individual, fitness_history, computing_times, logs=None):
+    """
+        Migawka stanu algorytmu: zwarta populacja, najlepszy osobnik, historia, numer generacji,
+        dodatkowe dzienniki generacji (logs - słownik nazwa -> lista wpisów)
+        oraz stan generatorów liczb losowych (random i numpy.random).
+    """
+    return {
+        'generation': generation,
+        'population': population.copy(),
+        'best': None if best_individual is None else best_individual.copy(),
+        'fitness_history': list(fitness_history),
+        'computing_times': list(computing_times),
+        'logs': {name: list(log) for name, log in (logs or {}).items()},
+        'random_state': random.getstate(),
+        'numpy_random_state': np.random.get_state(),
+    }
+
+
+def load_checkpoint(output_dir):
+    """
+        Odczyt ostatniego punktu kontrolnego z katalogu wyników.
+    """
+    with open(os.path.join(output_dir, CHECKPOINT_FILE), 'rb') as f:
+        return pickle.load(f)
+
+
+def restore_random_state(state):
+    """
+        Przywrócenie stanu generatorów liczb losowych zapisanego w punkcie kontrolnym.
+    """
+    random.setstate(state['random_state'])
+    np.random.set_state(state['numpy_random_state'])
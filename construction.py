@@ -0,0 +1,119 @@
+import random
+import numpy as np
+from occupancy import get_occupied_table, popcount, nth_set_bit, course_assignment, course_release, \
+    random_possible_assignment
+
+
+def reduce_or(masks, indptr, indices):
+    """
+        Suma bitowa (OR) masek dla każdego wiersza macierzy CSR (indptr, indices).
+        Puste wiersze dają maskę 0.
+    """
+    values = masks[indices]
+    out = np.zeros(indptr.size - 1, dtype=np.int64)
+    nonempty = indptr[:-1] < indptr[1:]
+    if values.size:
+        out[nonempty] = np.bitwise_or.reduceat(values, indptr[:-1][nonempty])
+    return out
+
+
+def feasible_slot_masks(occ, instance):
+    """
+        Maska okien czasowych, w których każdy kurs może jeszcze zostać przypisany: okno musi być wolne
+        dla co najmniej jednego dopuszczalnego prowadzącego, co najmniej jednego dopuszczalnego pokoju
+        oraz dla wszystkich grup kursu. Wynik dla wszystkich kursów naraz, wektor (c,).
+    """
+    free_t = reduce_or(~occ['t'] & occ['all'], instance.teacher_indptr, instance.teacher_indices)
+    free_r = reduce_or(~occ['r'] & occ['all'], instance.room_indptr, instance.room_indices)
+    busy_g = reduce_or(np.array(occ['g'], dtype=np.int64), instance.group_indptr, instance.group_indices)
+    return free_t & free_r & ~busy_g
+
+
+def most_constrained_course(sizes, open_courses, static_sizes):
+    """
+        Wybór kursu w stylu DSatur: najmniej dostępnych okien czasowych, przy remisie najmniej par
+        (prowadzący, pokój); pozostałe remisy rozstrzygane losowo.
+    """
+    candidates = np.flatnonzero(open_courses)
+    candidates = candidates[sizes[candidates] == sizes[candidates].min()]
+    candidates = candidates[static_sizes[candidates] == static_sizes[candidates].min()]
+    return int(candidates[random.randrange(candidates.size)])
+
+
+def least_constraining_assignment(c_idx, occ, instance, room_demand):
+    """
+        Losowe przypisanie (t, r, ts) kursu, w którym pokój wybierany jest spośród pokoi o najmniejszym
+        zapotrzebowaniu (oczekiwanym obciążeniu przez nieprzypisane kursy, z których każdy rozkłada się
+        równo na swoje dopuszczalne pokoje), a prowadzący i okno czasowe - z rozkładu jednostajnego.
+        Zwraca None, gdy żadne przypisanie nie jest możliwe.
+    """
+    allowed_t = instance.course_teachers[c_idx]
+    allowed_r = instance.course_rooms[c_idx]
+    busy_g = 0
+    for g_idx in instance.course_groups[c_idx]:
+        busy_g |= occ['g'][g_idx]
+    free_t = ~(occ['t'][allowed_t] | busy_g) & occ['all']
+    free = free_t[:, np.newaxis] & (~occ['r'][allowed_r] & occ['all'])[np.newaxis, :]
+    counts = popcount(free)
+    usable = counts.sum(axis=0) > 0
+    if not usable.any():
+        return None
+    demand = np.where(usable, room_demand[allowed_r], np.inf)
+    rooms = np.flatnonzero(demand == demand.min())
+    room = rooms[random.randrange(rooms.size)]
+    cumulative = np.cumsum(counts[:, room])
+    k = random.randrange(int(cumulative[-1]))
+    row = int(np.searchsorted(cumulative, k, side='right'))
+    if row:
+        k -= int(cumulative[row - 1])
+    return int(allowed_t[row]), int(allowed_r[room]), nth_set_bit(int(free[row, room]), k)
+
+
+def construct_individual(instance, individual, value_attempts=5, max_backtracks=200):
+    """
+        Konstrukcja zwartego osobnika (c, 3) w kolejności najbardziej ograniczonych kursów (DSatur),
+        z wyborem najmniej obleganego pokoju (least_constraining_assignment) i kontrolą w przód
+        (forward checking): przypisanie jest przyjmowane tylko wtedy, gdy każdy nieprzypisany kurs
+        ma nadal co najmniej jedno dopuszczalne okno czasowe. Gdy żadne z value_attempts
+        losowych przypisań nie przechodzi kontroli, cofane jest ostatnie przypisanie (co najwyżej
+        max_backtracks razy). Po wyczerpaniu limitu kursy przypisywane są zachłannie, a kursy bez
+        dopuszczalnego przypisania pozostają nieprzypisane.
+        Zwraca liczbę wykonanych nawrotów.
+    """
+    individual[:] = -1
+    occ = get_occupied_table(instance)
+    static_sizes = np.diff(instance.teacher_indptr) * np.diff(instance.room_indptr)
+    # kursy bez dopuszczalnego prowadzącego lub pokoju nie mogą zostać przypisane
+    open_courses = static_sizes > 0
+    room_share = instance.room_mask / np.maximum(instance.room_mask.sum(axis=1, keepdims=True), 1)
+    stack = []
+    backtracks = 0
+    while open_courses.any():
+        sizes = popcount(feasible_slot_masks(occ, instance))
+        c_idx = most_constrained_course(sizes, open_courses, static_sizes)
+        forward_checking = backtracks < max_backtracks
+        placed = False
+        room_demand = room_share[open_courses].sum(axis=0)
+        for _ in range(value_attempts if sizes[c_idx] else 0):
+            a = least_constraining_assignment(c_idx, occ, instance, room_demand)
+            course_assignment(individual, c_idx, occ, a, instance)
+            open_courses[c_idx] = False
+            if not forward_checking or popcount(feasible_slot_masks(occ, instance))[open_courses].all():
+                placed = True
+                break
+            course_release(individual, c_idx, occ, instance)
+            open_courses[c_idx] = True
+        if placed:
+            stack.append(c_idx)
+        elif forward_checking and stack:
+            backtracks += 1
+            last = stack.pop()
+            course_release(individual, last, occ, instance)
+            open_courses[last] = True
+        elif sizes[c_idx]:
+            # limit nawrotów wyczerpany (lub brak przypisań do cofnięcia) - przypisanie bez kontroli w przód
+            course_assignment(individual, c_idx, occ, random_possible_assignment(c_idx, occ, instance), instance)
+            open_courses[c_idx] = False
+        else:
+            open_courses[c_idx] = False
+    return backtracks
@@ -0,0 +1,99 @@
+import json
+import queue
+import threading
+import time
+import numpy as np
+
+
+def _json_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Obiekt typu {type(obj).__name__} nie jest serializowalny do JSON")
+
+
+class EventLog:
+    """
+        Strumień zdarzeń w formacie JSONL (jeden obiekt JSON na wiersz), np. jedno zdarzenie na generację
+        algorytmu genetycznego lub na kolejne rozwiązanie solvera.
+        Zdarzenia są buforowane w pamięci i dopisywane do pliku w osobnym wątku, gdy bufor osiągnie
+        buffer_size zdarzeń lub od ostatniego zapisu minie flush_interval sekund, więc emit nie czeka na dysk.
+        Każde zdarzenie otrzymuje pola 'event' (typ) i 'time' (sekundy od utworzenia strumienia).
+    """
+
+    def __init__(self, path, buffer_size=50, flush_interval=5.0, append=False):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.start = time.time()
+        self.last_flush = self.start
+        self.tasks = queue.Queue()
+        if not append:
+            open(path, 'w').close()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def emit(self, event, **fields):
+        """
+            Dodanie zdarzenia typu event z polami fields (wartości numpy zamieniane są na typy Pythona).
+        """
+        now = time.time()
+        self.buffer.append(json.dumps({'event': event, 'time': now - self.start, **fields},
+                                      ensure_ascii=False, default=_json_default))
+        if len(self.buffer) >= self.buffer_size or now - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+            Przekazanie zbuforowanych zdarzeń do zapisu w tle.
+        """
+        if self.buffer:
+            self.tasks.put(self.buffer)
+            self.buffer = []
+        self.last_flush = time.time()
+
+    def _run(self):
+        while True:
+            lines = self.tasks.get()
+            if lines is None:
+                return
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(lines) + '\n')
+            except Exception as e:
+                print(f"Nie udało się zapisać zdarzeń do pliku {self.path}: {e}")
+
+    def close(self):
+        """
+            Zapis pozostałych zdarzeń i zakończenie wątku zapisu.
+        """
+        self.flush()
+        self.tasks.put(None)
+        self.thread.join()
+
+
+def read_events(path, event=None):
+    """
+        Odczyt strumienia zdarzeń z pliku JSONL (opcjonalnie tylko zdarzeń typu event).
+    """
+    with open(path, encoding='utf-8') as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    if event is not None:
+        events = [e for e in events if e['event'] == event]
+    return events
+
+
+def objective_summary(values, components=None, component_names=None):
+    """
+        Podsumowanie wartości funkcji celu populacji: najlepsza, średnia i najgorsza wartość oraz
+        (gdy podano macierz components (n, k)) składowe najlepszego osobnika i średnie składowe.
+    """
+    values = np.asarray(values, dtype=float)
+    summary = {'best': float(values.min()), 'mean': float(values.mean()), 'worst': float(values.max())}
+    if components is not None:
+        components = np.asarray(components, dtype=float)
+        summary['components'] = dict(zip(component_names, components[int(values.argmin())].tolist()))
+        summary['mean_components'] = dict(zip(component_names, components.mean(axis=0).tolist()))
+    return summary
@@ -0,0 +1,385 @@
+import numpy as np
+import multiprocessing
+import hashlib
+from collections import OrderedDict
+import fitness_kernels
+
+
+# Kolejność kolumn macierzy składowych funkcji celu (zgodna z wagami w w fitness)
+COMPONENTS = ('gaps', 'group_gaps', 'prefs', 'room_changes', 'group_room_changes')
+
+
+def preference_matrix(t, ts, teacher_preferences):
+    """
+        Zamiana rzadkiego słownika preferencji { "t": { "ts": ocena } } na macierz kar (t, ts).
+    """
+    penalties = np.zeros((t, ts), dtype=float)
+    if not teacher_preferences:
+        return penalties
+    for t_key, prefs in teacher_preferences.items():
+        t_idx = int(t_key)
+        if t_idx >= t:
+            continue
+        for ts_key, pref_score in prefs.items():
+            penalties[t_idx, int(ts_key)] = 1.0 - (int(pref_score) / 5.0)
+    return penalties
+
+
+def build_fitness_data(c, t, r, ts, g_c_mapping, teacher_preferences=None):
+    """
+        Dane instancji potrzebne do ewaluacji populacji, wyliczane jednorazowo.
+    """
+    groups = list(g_c_mapping.keys())
+    cg_course = np.array([c_idx for g in groups for c_idx in g_c_mapping[g]], dtype=np.intp)
+    cg_group = np.array([g_idx for g_idx, g in enumerate(groups) for _ in g_c_mapping[g]], dtype=np.intp)
+    return {
+        'c': c,
+        't': t,
+        'r': r,
+        'ts': ts,
+        'groups': groups,
+        'cg_course': cg_course,
+        'cg_group': cg_group,
+        'preferences': preference_matrix(t, ts, teacher_preferences),
+    }
+
+
+def population_occupancy(population, fitness_data):
+    """
+        Tablice zajętości prowadzący×okno i grupa×okno oraz pokoi zajmowanych w tych oknach.
+        Przy konfliktach wybierany jest pokój o najmniejszym indeksie.
+    """
+    n, c, _ = population.shape
+    t, r, ts = fitness_data['t'], fitness_data['r'], fitness_data['ts']
+    n_groups = len(fitness_data['groups'])
+
+    p_idx, c_idx = np.nonzero(population[:, :, 0] >= 0)
+    t_idx = population[p_idx, c_idx, 0]
+    r_idx = population[p_idx, c_idx, 1]
+    ts_idx = population[p_idx, c_idx, 2]
+
+    teacher_rooms = np.full((n, t, ts), r, dtype=np.intp)
+    np.minimum.at(teacher_rooms, (p_idx, t_idx, ts_idx), r_idx)
+
+    # rozwinięcie przypisań kursów na przynależne im grupy
+    assigned = np.zeros((n, c), dtype=np.intp)
+    assigned[p_idx, c_idx] = np.arange(p_idx.size) + 1
+    pair_assignment = assigned[:, fitness_data['cg_course']]
+    gp_idx, pair_idx = np.nonzero(pair_assignment)
+    a_idx = pair_assignment[gp_idx, pair_idx] - 1
+    group_rooms = np.full((n, n_groups, ts), r, dtype=np.intp)
+    np.minimum.at(group_rooms, (gp_idx, fitness_data['cg_group'][pair_idx], ts_idx[a_idx]), r_idx[a_idx])
+
+    teacher_occupied = teacher_rooms < r
+    group_occupied = group_rooms < r
+    teacher_rooms[~teacher_occupied] = -1
+    group_rooms[~group_occupied] = -1
+    return teacher_occupied, teacher_rooms, group_occupied, group_rooms
+
+
+def population_fitness_components(population, fitness_data):
+    """
+        Wszystkie składowe funkcji celu dla całej zwartej populacji (n, c, 3) w jednym przebiegu.
+        Zwraca macierz (n, 5) w kolejności COMPONENTS.
+    """
+    teacher_occupied, teacher_rooms, group_occupied, group_rooms = population_occupancy(population, fitness_data)
+    components = np.empty((population.shape[0], len(COMPONENTS)), dtype=float)
+    count_gaps, count_room_changes = fitness_kernels.get_kernels()
+    components[:, 0] = count_gaps(teacher_occupied)
+    components[:, 1] = count_gaps(group_occupied)
+    components[:, 2] = (teacher_occupied * fitness_data['preferences']).sum(axis=(1, 2))
+    components[:, 3] = count_room_changes(teacher_rooms)
+    components[:, 4] = count_room_changes(group_rooms)
+    return components
+
+
+def population_fitness(population, fitness_data, w=(3.0, 2.0, 1.0, 1.0, 0.3)):
+    """
+        Ważona suma składowych funkcji celu dla każdego osobnika populacji.
+    """
+    return population_fitness_components(population, fitness_data) @ np.asarray(w, dtype=float)
+
+
+class FitnessCache:
+    """
+        Ograniczona pamięć podręczna LRU składowych funkcji celu, z kluczem będącym skrótem
+        zwartego osobnika. Duplikaty w obrębie jednej populacji również liczone są tylko raz.
+    """
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(individual):
+        return hashlib.blake2b(np.ascontiguousarray(individual).tobytes(), digest_size=16).digest()
+
+    def components(self, population, evaluate):
+        """
+            Składowe funkcji celu dla populacji; evaluate(podpopulacja) liczy tylko brakujące osobniki.
+        """
+        result = np.empty((population.shape[0], len(COMPONENTS)), dtype=float)
+        missing = {}
+        for j, individual in enumerate(population):
+            key = self.key(individual)
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                result[j] = self.entries[key]
+                self.hits += 1
+            elif key in missing:
+                missing[key].append(j)
+                self.hits += 1
+            else:
+                missing[key] = [j]
+                self.misses += 1
+        if missing:
+            computed = evaluate(population[[positions[0] for positions in missing.values()]])
+            for (key, positions), components in zip(missing.items(), computed):
+                result[positions] = components
+                self.entries[key] = components
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return result
+
+    def take_stats(self):
+        """
+            Liczba trafień i chybień od ostatniego wywołania (zerowanie liczników).
+        """
+        stats = (self.hits, self.misses)
+        self.hits = 0
+        self.misses = 0
+        return stats
+
+
+# Dane instancji w procesie roboczym, przekazywane jednorazowo przy jego starcie
+_worker_fitness_data = None
+
+
+def _init_worker(fitness_data, backend):
+    global _worker_fitness_data
+    _worker_fitness_data = fitness_data
+    fitness_kernels.set_kernel_backend(backend)
+
+
+def _evaluate_chunk(chunk):
+    return population_fitness_components(chunk, _worker_fitness_data)
+
+
+class PopulationEvaluator:
+    """
+        Ewaluacja populacji w stałej puli procesów roboczych.
+        Dane instancji (fitness_data) trafiają do procesów tylko raz, przy ich uruchomieniu;
+        w zadaniach przesyłane są jedynie fragmenty zwartej populacji.
+        Dla n_workers <= 1 ewaluacja odbywa się w bieżącym procesie.
+        cache_size > 0 włącza pamięć podręczną FitnessCache, dzięki której powtarzające się osobniki
+        nie są oceniane ponownie.
+        backend wybiera implementację jąder z fitness_kernels ('auto', 'numpy', 'numba');
+        None pozostawia bieżącą.
+    """
+
+    def __init__(self, fitness_data, n_workers=None, chunks_per_worker=1, cache_size=0, backend=None):
+        self.fitness_data = fitness_data
+        self.backend = fitness_kernels.set_kernel_backend(backend) if backend else fitness_kernels.get_kernel_backend()
+        self.n_workers = n_workers or 1
+        self.chunks_per_worker = chunks_per_worker
+        self.cache = FitnessCache(cache_size) if cache_size else None
+        self.pool = None
+        if self.n_workers > 1:
+            self.pool = multiprocessing.Pool(self.n_workers, initializer=_init_worker,
+                                             initargs=(fitness_data, self.backend))
+
+    def components(self, population):
+        """
+            Macierz składowych funkcji celu (n, 5) dla zwartej populacji (n, c, 3).
+        """
+        if self.cache is not None:
+            return self.cache.components(population, self._evaluate)
+        return self._evaluate(population)
+
+    def _evaluate(self, population):
+        if self.pool is None or population.shape[0] < 2:
+            return population_fitness_components(population, self.fitness_data)
+        n_chunks = min(population.shape[0], self.n_workers * self.chunks_per_worker)
+        return np.concatenate(self.pool.map(_evaluate_chunk, np.array_split(population, n_chunks)))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def day_scores(entries, s):
+    """
+        'Okienka' i zmiany pokoju dla jednego dnia na podstawie listy par (okno w dniu, pokój).
+        Zwraca również listę zajętych okien.
+    """
+    slot_rooms = [None] * s
+    for slot, room in entries:
+        if slot_rooms[slot] is None or room < slot_rooms[slot]:
+            slot_rooms[slot] = room
+    active = [slot for slot in range(s) if slot_rooms[slot] is not None]
+    if not active:
+        return 0, 0, active
+    gaps = active[-1] - active[0] + 1 - len(active)
+    changes = sum(slot_rooms[a] != slot_rooms[b] for a, b in zip(active, active[1:]))
+    return gaps, changes, active
+
+
+class DeltaEvaluator:
+    """
+        Przyrostowa ewaluacja jednego zwartego osobnika (c, 3).
+        Składowe funkcji celu są przechowywane dla każdej pary prowadzący-dzień i grupa-dzień,
+        a po ruchu przeliczane są tylko dni, których ruch dotyczy.
+
+        Obsługiwane ruchy:
+            ('assign', c_idx, t_idx, r_idx, ts_idx) - nowe przypisanie jednego kursu,
+            ('swap_timeslots', ts_idx1, ts_idx2) - zamiana dwóch okien czasowych,
+            ('changes', [(c_idx, (t_idx, r_idx, ts_idx)), ...]) - dowolny zestaw nowych przypisań.
+    """
+
+    def __init__(self, individual, fitness_data, w=(3.0, 2.0, 1.0, 1.0, 0.3), days=5):
+        self.individual = individual
+        self.w = np.asarray(w, dtype=float)
+        self.preferences = fitness_data['preferences']
+        self.days = days
+        self.s = fitness_data['ts'] // days
+        t = fitness_data['t']
+        n_groups = len(fitness_data['groups'])
+
+        self.course_groups = [[] for _ in range(individual.shape[0])]
+        self.group_courses = [[] for _ in range(n_groups)]
+        for c_idx, g_idx in zip(fitness_data['cg_course'].tolist(), fitness_data['cg_group'].tolist()):
+            self.course_groups[c_idx].append(g_idx)
+            self.group_courses[g_idx].append(c_idx)
+        self.teacher_courses = [set() for _ in range(t)]
+        for c_idx, t_idx in enumerate(individual[:, 0].tolist()):
+            if t_idx >= 0:
+                self.teacher_courses[t_idx].add(c_idx)
+
+        # [okienka, preferencje, zmiany pokoju] oraz [okienka, zmiany pokoju]
+        self.teacher_day = np.zeros((t, days, 3), dtype=float)
+        self.group_day = np.zeros((n_groups, days, 2), dtype=float)
+        for t_idx in range(t):
+            for d in range(days):
+                self.teacher_day[t_idx, d] = self._teacher_day_scores(t_idx, d)
+        for g_idx in range(n_groups):
+            for d in range(days):
+                self.group_day[g_idx, d] = self._group_day_scores(g_idx, d)
+
+    def _day_entries(self, courses, d):
+        entries = []
+        for c_idx in courses:
+            _, r_idx, ts_idx = self.individual[c_idx].tolist()
+            if r_idx >= 0 and ts_idx // self.s == d:
+                entries.append((ts_idx % self.s, r_idx))
+        return entries
+
+    def _teacher_day_scores(self, t_idx, d):
+        gaps, changes, active = day_scores(self._day_entries(self.teacher_courses[t_idx], d), self.s)
+        prefs = sum(self.preferences[t_idx, d * self.s + slot] for slot in active)
+        return gaps, prefs, changes
+
+    def _group_day_scores(self, g_idx, d):
+        gaps, changes, _ = day_scores(self._day_entries(self.group_courses[g_idx], d), self.s)
+        return gaps, changes
+
+    def components(self):
+        """
+            Składowe funkcji celu w kolejności COMPONENTS.
+        """
+        teacher = self.teacher_day.sum(axis=(0, 1))
+        group = self.group_day.sum(axis=(0, 1))
+        return np.array([teacher[0], group[0], teacher[1], teacher[2], group[1]])
+
+    def value(self):
+        return float(self.components() @ self.w)
+
+    def move_changes(self, move):
+        """
+            Zamiana ruchu na listę nowych przypisań kursów.
+        """
+        kind = move[0]
+        if kind == 'assign':
+            return [(move[1], tuple(move[2:5]))]
+        if kind == 'swap_timeslots':
+            _, ts_idx1, ts_idx2 = move
+            changes = []
+            for c_idx in np.nonzero(np.isin(self.individual[:, 2], (ts_idx1, ts_idx2)))[0].tolist():
+                t_idx, r_idx, ts_idx = self.individual[c_idx].tolist()
+                changes.append((c_idx, (t_idx, r_idx, ts_idx2 if ts_idx == ts_idx1 else ts_idx1)))
+            return changes
+        if kind == 'changes':
+            return list(move[1])
+        raise ValueError(f"Nieznany rodzaj ruchu: {kind}")
+
+    def _write(self, changes):
+        """
+            Zapis przypisań w osobniku; zwraca poprzednie przypisania oraz dotknięte dni.
+        """
+        previous = []
+        teacher_days = set()
+        group_days = set()
+        for c_idx, a in changes:
+            old = tuple(self.individual[c_idx].tolist())
+            previous.append((c_idx, old))
+            for t_idx, _, ts_idx in (old, a):
+                if t_idx >= 0:
+                    teacher_days.add((t_idx, ts_idx // self.s))
+                    for g_idx in self.course_groups[c_idx]:
+                        group_days.add((g_idx, ts_idx // self.s))
+            if old[0] >= 0:
+                self.teacher_courses[old[0]].discard(c_idx)
+            if a[0] >= 0:
+                self.teacher_courses[a[0]].add(c_idx)
+            self.individual[c_idx] = a
+        return previous, teacher_days, group_days
+
+    def _rescore(self, teacher_days, group_days):
+        teacher_new = {key: self._teacher_day_scores(*key) for key in teacher_days}
+        group_new = {key: self._group_day_scores(*key) for key in group_days}
+        return teacher_new, group_new
+
+    def _difference(self, teacher_new, group_new):
+        diff = np.zeros(5)
+        for key, scores in teacher_new.items():
+            d_gaps, d_prefs, d_changes = np.asarray(scores) - self.teacher_day[key]
+            diff[0] += d_gaps
+            diff[2] += d_prefs
+            diff[3] += d_changes
+        for key, scores in group_new.items():
+            d_gaps, d_changes = np.asarray(scores) - self.group_day[key]
+            diff[1] += d_gaps
+            diff[4] += d_changes
+        return diff
+
+    def delta(self, move):
+        """
+            Zmiana wartości funkcji celu po wykonaniu ruchu, bez zmiany osobnika.
+        """
+        previous, teacher_days, group_days = self._write(self.move_changes(move))
+        teacher_new, group_new = self._rescore(teacher_days, group_days)
+        self._write(previous[::-1])
+        return float(self._difference(teacher_new, group_new) @ self.w)
+
+    def apply(self, move):
+        """
+            Wykonanie ruchu na osobniku i aktualizacja zapamiętanych składowych dotkniętych dni.
+            Zwraca zmianę wartości funkcji celu.
+        """
+        _, teacher_days, group_days = self._write(self.move_changes(move))
+        teacher_new, group_new = self._rescore(teacher_days, group_days)
+        diff = self._difference(teacher_new, group_new)
+        for key, scores in teacher_new.items():
+            self.teacher_day[key] = scores
+        for key, scores in group_new.items():
+            self.group_day[key] = scores
+        return float(diff @ self.w)
@@ -0,0 +1,225 @@
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def count_occupancy_gaps(occupied, days=5):
+    """
+        Liczba 'okienek' dla tablicy zajętości (n, e, ts), gdzie e to prowadzący lub grupy.
+        Zwraca wektor (n,).
+    """
+    n, e, ts = occupied.shape
+    daily = occupied.reshape(n, e, days, ts // days)
+    s = daily.shape[-1]
+    first = np.argmax(daily, axis=-1)
+    last = s - 1 - np.argmax(daily[..., ::-1], axis=-1)
+    gaps = np.where(daily.any(axis=-1), last - first + 1 - daily.sum(axis=-1), 0)
+    return gaps.sum(axis=(1, 2))
+
+
+def count_occupancy_room_changes(rooms, days=5):
+    """
+        Liczba zmian pokoju dla tablicy pokoi (n, e, ts), w której -1 oznacza brak zajęć.
+        Zwraca wektor (n,).
+    """
+    n, e, ts = rooms.shape
+    daily = rooms.reshape(n, e, days, ts // days)
+    s = daily.shape[-1]
+    active = daily >= 0
+    # indeks ostatniego aktywnego okna przed danym oknem (-1 gdy brak)
+    last_active = np.maximum.accumulate(np.where(active, np.arange(s), -1), axis=-1)
+    prev = np.concatenate([np.full(last_active.shape[:-1] + (1,), -1), last_active[..., :-1]], axis=-1)
+    prev_room = np.take_along_axis(daily, np.maximum(prev, 0), axis=-1)
+    changes = active & (prev >= 0) & (daily != prev_room)
+    return changes.sum(axis=(1, 2, 3))
+
+
+if numba is not None:
+
+    @numba.njit(cache=True)
+    def _numba_gaps(occupied, days):
+        n, e, ts = occupied.shape
+        s = ts // days
+        result = np.zeros(n, dtype=np.int64)
+        for p in range(n):
+            total = 0
+            for k in range(e):
+                for d in range(days):
+                    first = -1
+                    last = -1
+                    count = 0
+                    for j in range(s):
+                        if occupied[p, k, d * s + j]:
+                            if first < 0:
+                                first = j
+                            last = j
+                            count += 1
+                    if first >= 0:
+                        total += last - first + 1 - count
+            result[p] = total
+        return result
+
+    @numba.njit(cache=True)
+    def _numba_room_changes(rooms, days):
+        n, e, ts = rooms.shape
+        s = ts // days
+        result = np.zeros(n, dtype=np.int64)
+        for p in range(n):
+            total = 0
+            for k in range(e):
+                for d in range(days):
+                    prev = -1
+                    for j in range(s):
+                        room = rooms[p, k, d * s + j]
+                        if room >= 0:
+                            if prev >= 0 and room != prev:
+                                total += 1
+                            prev = room
+            result[p] = total
+        return result
+
+
+def numba_count_occupancy_gaps(occupied, days=5):
+    """
+        Wersja count_occupancy_gaps kompilowana przez Numba.
+    """
+    return _numba_gaps(np.ascontiguousarray(occupied), days)
+
+
+def numba_count_occupancy_room_changes(rooms, days=5):
+    """
+        Wersja count_occupancy_room_changes kompilowana przez Numba.
+    """
+    return _numba_room_changes(np.ascontiguousarray(rooms), days)
+
+
+BACKENDS = {
+    'numpy': (count_occupancy_gaps, count_occupancy_room_changes),
+    'numba': (numba_count_occupancy_gaps, numba_count_occupancy_room_changes),
+}
+
+_backend = 'numpy'
+
+
+def available_backends():
+    return ['numpy', 'numba'] if numba is not None else ['numpy']
+
+
+def set_kernel_backend(name='auto'):
+    """
+        Wybór implementacji liczników 'okienek' i zmian pokoju: 'numpy', 'numba' lub 'auto'
+        (numba, jeśli jest zainstalowana). Przy braku numba używana jest wersja numpy.
+        Zwraca nazwę faktycznie wybranej implementacji.
+    """
+    global _backend
+    if name == 'auto':
+        name = 'numba' if numba is not None else 'numpy'
+    if name not in BACKENDS:
+        raise ValueError(f"Nieznana implementacja jąder: {name}")
+    if name not in available_backends():
+        print(f"Implementacja '{name}' jest niedostępna, używana jest 'numpy'.")
+        name = 'numpy'
+    _backend = name
+    return _backend
+
+
+def get_kernel_backend():
+    return _backend
+
+
+def get_kernels():
+    """
+        Para funkcji (liczba okienek, liczba zmian pokoju) bieżącej implementacji.
+    """
+    return BACKENDS[_backend]
+
+
+def assert_parity(results, what):
+    """
+        Zgłoszenie AssertionError, gdy którakolwiek implementacja w wyniku porównania {implementacja: True/False}
+        daje inne wyniki niż implementacja wzorcowa.
+    """
+    failed = sorted(name for name, ok in results.items() if not ok)
+    if failed:
+        raise AssertionError(f"Niezgodność {what} dla implementacji: {', '.join(failed)}")
+
+
+def check_kernel_parity(n=8, e=50, days=5, s=7, r=30, density=0.4, seed=0, strict=True):
+    """
+        Porównanie wyników wszystkich dostępnych implementacji na losowych tablicach zajętości.
+        Zwraca słownik {implementacja: True/False}; strict - AssertionError przy niezgodności (assert_parity).
+    """
+    rng = np.random.default_rng(seed)
+    occupied = rng.random((n, e, days * s)) < density
+    rooms = np.where(occupied, rng.integers(0, r, size=occupied.shape), -1)
+    expected_gaps = count_occupancy_gaps(occupied, days)
+    expected_changes = count_occupancy_room_changes(rooms, days)
+    results = {}
+    for name in available_backends():
+        count_gaps, count_room_changes = BACKENDS[name]
+        results[name] = bool(np.array_equal(count_gaps(occupied, days), expected_gaps)
+                             and np.array_equal(count_room_changes(rooms, days), expected_changes))
+    if strict:
+        assert_parity(results, "na losowych tablicach zajętości")
+    return results
+
+
+def check_population_parity(population, fitness_data, g_c_mapping, teacher_preferences=None, strict=True):
+    """
+        Porównanie składowych funkcji celu liczonych każdą dostępną implementacją z funkcjami count_*
+        z optimization.py (na postaci gęstej). Zwraca słownik {implementacja: True/False};
+        strict - AssertionError przy niezgodności (assert_parity).
+    """
+    from optimization import compact_to_dense, count_gaps, count_group_gaps, count_preference_penalty_sparse, \
+        count_room_changes, count_group_room_changes
+    from fitness_evaluation import population_fitness_components
+
+    expected = []
+    for individual in population:
+        sol = compact_to_dense(individual, fitness_data['t'], fitness_data['r'], fitness_data['ts'])
+        expected.append([
+            count_gaps(sol),
+            count_group_gaps(sol, g_c_mapping),
+            count_preference_penalty_sparse(sol, teacher_preferences) if teacher_preferences else 0,
+            count_room_changes(sol),
+            count_group_room_changes(sol, g_c_mapping),
+        ])
+    previous = get_kernel_backend()
+    results = {}
+    try:
+        for name in available_backends():
+            set_kernel_backend(name)
+            results[name] = bool(np.allclose(population_fitness_components(population, fitness_data), expected))
+    finally:
+        set_kernel_backend(previous)
+    if strict:
+        assert_parity(results, "z funkcjami count_*")
+    return results
+
+
+if __name__ == "__main__":
+    from optimization import open_json, create_instance, generate_population_satisfying_constraints, \
+        mutate_swap_timeslots
+    from fitness_evaluation import build_fitness_data
+    import json
+
+    print(f"dostępne implementacje: {available_backends()}")
+    print(f"zgodność na losowych tablicach zajętości: {check_kernel_parity()}")
+
+    course_data = open_json("Final_load_data/merged_filtered_course_data.json")
+    rooms_type_mapping_data = open_json("Final_load_data/final_class_type_to_rooms.json")
+    instance = create_instance(course_data, rooms_type_mapping_data, 35)
+    ts = instance.ts
+    with open("teacher_preferences2.json") as f:
+        teacher_preferences = json.load(f)
+
+    population = generate_population_satisfying_constraints(instance, 4)
+    population = mutate_swap_timeslots(population, 1.0, ts)
+    # losowe okna czasowe części kursów - osobniki z konfliktami
+    population[-1, ::4, 2] = np.random.randint(ts, size=population[-1, ::4, 2].shape)
+    fitness_data = build_fitness_data(instance.c, instance.t, instance.r, ts, instance.g_c_mapping, teacher_preferences)
+    print(f"zgodność z funkcjami count_*: "
+          f"{check_population_parity(population, fitness_data, instance.g_c_mapping, teacher_preferences)}")
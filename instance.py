@@ -0,0 +1,84 @@
+import numpy as np
+
+
+class Instance:
+    """
+        Dane instancji wyliczane jednorazowo i współdzielone przez generator populacji, krzyżowanie,
+        naprawę, ograniczenia oraz model CP-SAT:
+        - teacher_mask (c, t), room_mask (c, r) - dopuszczalni prowadzący i pokoje kursów,
+        - course_teachers[c_idx], course_rooms[c_idx] - te same zbiory jako tablice indeksów,
+          a także w formacie CSR (teacher_indptr, teacher_indices), (room_indptr, room_indices),
+          teacher_courses[t_idx] - kursy, które może prowadzić prowadzący,
+        - incydencja kurs-grupa jako macierz rzadka CSR (group_indptr, group_indices) oraz jej transpozycja
+          (course_indptr, course_indices); course_groups[c_idx] to krotka indeksów grup kursu,
+        - rooms_by_type - tablice indeksów pokoi dla każdego typu sali.
+        Słowniki c_t_mapping, c_r_mapping, g_c_mapping i c_g_mapping pozostają dostępne dla funkcji,
+        które operują na nich bezpośrednio (np. count_* dla postaci gęstej).
+    """
+
+    def __init__(self, c, t, r, ts, c_t_mapping, c_r_mapping, g_c_mapping, rooms_by_type=None, days=5, names=None):
+        if ts > 63:
+            raise ValueError("Liczba okien czasowych nie może przekraczać 63 (maski bitowe int64).")
+        self.c, self.t, self.r, self.ts = c, t, r, ts
+        self.days = days
+        self.s = ts // days
+        self.c_t_mapping = c_t_mapping
+        self.c_r_mapping = c_r_mapping
+        self.g_c_mapping = g_c_mapping
+        self.names = names or {}
+
+        self.teacher_mask = np.zeros((c, t), dtype=bool)
+        self.room_mask = np.zeros((c, r), dtype=bool)
+        for c_idx in range(c):
+            self.teacher_mask[c_idx, c_t_mapping.get(c_idx, [])] = True
+            self.room_mask[c_idx, c_r_mapping.get(c_idx, [])] = True
+        self.course_teachers = [np.flatnonzero(row) for row in self.teacher_mask]
+        self.course_rooms = [np.flatnonzero(row) for row in self.room_mask]
+        self.teacher_courses = [np.flatnonzero(col) for col in self.teacher_mask.T]
+        self.teacher_indptr = np.concatenate([[0], np.cumsum(self.teacher_mask.sum(axis=1))])
+        self.teacher_indices = np.nonzero(self.teacher_mask)[1]
+        self.room_indptr = np.concatenate([[0], np.cumsum(self.room_mask.sum(axis=1))])
+        self.room_indices = np.nonzero(self.room_mask)[1]
+
+        # incydencja grupa -> kursy (CSR) oraz transpozycja kurs -> grupy
+        self.groups = list(g_c_mapping.keys())
+        self.group_index = {g: g_idx for g_idx, g in enumerate(self.groups)}
+        self.course_indptr = np.cumsum([0] + [len(g_c_mapping[g]) for g in self.groups])
+        self.course_indices = np.array([c_idx for g in self.groups for c_idx in g_c_mapping[g]], dtype=np.intp)
+        self.entry_groups = np.repeat(np.arange(len(self.groups)), np.diff(self.course_indptr))
+        order = np.argsort(self.course_indices, kind='stable')
+        self.group_indptr = np.searchsorted(self.course_indices[order], np.arange(c + 1))
+        self.group_indices = self.entry_groups[order]
+        self.course_groups = [tuple(self.group_indices[self.group_indptr[c_idx]:self.group_indptr[c_idx + 1]].tolist())
+                              for c_idx in range(c)]
+        self.c_g_mapping = {c_idx: [self.groups[g_idx] for g_idx in self.course_groups[c_idx]] for c_idx in range(c)}
+
+        self.rooms_by_type = {room_type: np.asarray(rooms, dtype=np.intp)
+                              for room_type, rooms in (rooms_by_type or {}).items()}
+
+    @property
+    def n_groups(self):
+        return len(self.groups)
+
+    def group_courses(self, g_idx):
+        """
+            Indeksy kursów grupy o indeksie g_idx.
+        """
+        return self.course_indices[self.course_indptr[g_idx]:self.course_indptr[g_idx + 1]]
+
+    def group_load(self, course_slots):
+        """
+            Suma wierszy tablicy (c, ...) po kursach każdej grupy - iloczyn transpozycji macierzy incydencji
+            z course_slots. Zwraca tablicę (g, ...).
+        """
+        load = np.zeros((self.n_groups,) + course_slots.shape[1:], dtype=course_slots.dtype)
+        np.add.at(load, self.entry_groups, course_slots[self.course_indices])
+        return load
+
+    def courses_share_group(self):
+        """
+            Macierz (c, c) - czy dwa kursy mają wspólną grupę studencką.
+        """
+        incidence = np.zeros((self.c, self.n_groups), dtype=np.int32)
+        incidence[np.repeat(np.arange(self.c), np.diff(self.group_indptr)), self.group_indices] = 1
+        return (incidence @ incidence.T) > 0
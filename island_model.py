@@ -0,0 +1,188 @@
+import multiprocessing
+import queue
+import random
+import json
+import os
+import numpy as np
+from optimization import open_json, create_instance, genetic_algorithm, save_best
+from fitness_evaluation import build_fitness_data, population_fitness
+
+
+def ring_target(island_idx, n_islands):
+    """
+        Wyspa docelowa w topologii pierścienia.
+    """
+    return (island_idx + 1) % n_islands
+
+
+def random_target(island_idx, n_islands):
+    """
+        Losowa wyspa docelowa (inna niż bieżąca).
+    """
+    return random.choice([k for k in range(n_islands) if k != island_idx])
+
+
+def island_worker(island_idx, n_islands, inboxes, results, seed, topology, migration_timeout, ga_kwargs):
+    """
+        Przebieg algorytmu genetycznego na jednej wyspie (w osobnym procesie).
+        Emigranci wysyłani są w postaci zwartej (k, c, 3) przez kolejkę wyspy docelowej.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+
+    def migrate(emigrants, generation):
+        target = ring_target(island_idx, n_islands) if topology == 'ring' else random_target(island_idx, n_islands)
+        inboxes[target].put(emigrants)
+        received = []
+        if topology == 'ring':
+            # w pierścieniu każda wyspa otrzymuje dokładnie jedną paczkę od poprzednika
+            try:
+                received.append(inboxes[island_idx].get(timeout=migration_timeout))
+            except queue.Empty:
+                print(f"wyspa {island_idx}: brak imigrantów w generacji {generation + 1}")
+        else:
+            while True:
+                try:
+                    received.append(inboxes[island_idx].get_nowait())
+                except queue.Empty:
+                    break
+        if not received:
+            return None
+        return np.concatenate(received)[:len(emigrants)]
+
+    best = genetic_algorithm(migrate=migrate, **ga_kwargs)
+    results.put((island_idx, best))
+
+
+def collect_results(results, processes, poll_interval=1.0):
+    """
+        Odbiór wyników (numer wyspy, najlepszy osobnik) wszystkich procesów wysp z kolejki results.
+        Gdy proces wyspy zakończy się bez przekazania wyniku, pozostałe procesy są przerywane
+        i zgłaszany jest RuntimeError (zamiast oczekiwania w nieskończoność).
+    """
+    pending = set(range(len(processes)))
+    while pending:
+        try:
+            island_idx, best = results.get(timeout=poll_interval)
+        except queue.Empty:
+            dead = [k for k in sorted(pending) if not processes[k].is_alive()]
+            if not dead:
+                continue
+            # wynik mógł zostać wysłany tuż przed zakończeniem procesu i nie być jeszcze odebrany
+            try:
+                island_idx, best = results.get(timeout=poll_interval)
+            except queue.Empty:
+                for p in processes:
+                    if p.is_alive():
+                        p.terminate()
+                    p.join()
+                codes = ", ".join(f"wyspa {k}: kod wyjścia {processes[k].exitcode}" for k in dead)
+                raise RuntimeError(f"Proces wyspy zakończył się bez przekazania wyniku ({codes}).")
+        pending.discard(island_idx)
+        yield island_idx, best
+
+
+def island_genetic_algorithm(instance, population_size, generations, mutation_rate, saving_every, n_islands=4,
+                             migration_every=5, migration_size=2, topology='ring', seeds=None, output_dir='output_islands',
+                             preferences_path=None, w=(3.0, 2.0, 1.0, 1.0, 0.3), migration_timeout=600.0, verbose=False,
+                             poll_interval=1.0):
+    """
+        Model wyspowy: n_islands niezależnych populacji w osobnych procesach, wymieniających
+        migration_size najlepszych osobników co migration_every generacji (topology: 'ring' lub 'random').
+        mutation_rate może być liczbą lub listą wartości dla poszczególnych wysp.
+        Wyniki każdej wyspy zapisywane są w {output_dir}/island_{k} w formacie genetic_algorithm,
+        a najlepszy osobnik ze wszystkich wysp w {output_dir}/best.npz.
+        Przebieg każdej wyspy zapisywany jest w strumieniu zdarzeń {output_dir}/island_{k}/events.jsonl;
+        verbose - wypisywanie wartości funkcji celu wszystkich osobników (domyślnie wyłączone, aby
+        wyjście wysp się nie przeplatało).
+        Wyniki wysp odbierane są z limitem czasu poll_interval [s]; gdy proces wyspy zakończy się (np. z powodu
+        wyjątku lub braku pamięci) bez przekazania wyniku, pozostałe wyspy są przerywane i zgłaszany jest
+        RuntimeError.
+    """
+    if topology not in ('ring', 'random'):
+        print(f"Nieznana topologia: {topology}")
+        return
+    if n_islands < 2:
+        print("Model wyspowy wymaga co najmniej dwóch wysp.")
+        return
+    if seeds is None:
+        seeds = [random.randrange(2**32) for _ in range(n_islands)]
+    if np.isscalar(mutation_rate):
+        mutation_rate = [mutation_rate] * n_islands
+
+    inboxes = [multiprocessing.Queue() for _ in range(n_islands)]
+    results = multiprocessing.Queue()
+    processes = []
+    for k in range(n_islands):
+        ga_kwargs = dict(
+            instance=instance,
+            population_size=population_size,
+            generations=generations,
+            mutation_rate=mutation_rate[k],
+            saving_every=saving_every,
+            output_dir=f'{output_dir}/island_{k}',
+            preferences_path=preferences_path,
+            w=w,
+            migration_every=migration_every,
+            migration_size=migration_size,
+            verbose=verbose,
+        )
+        p = multiprocessing.Process(target=island_worker,
+                                    args=(k, n_islands, inboxes, results, seeds[k], topology, migration_timeout, ga_kwargs))
+        p.start()
+        processes.append(p)
+
+    bests = {}
+    for island_idx, best in collect_results(results, processes, poll_interval):
+        bests[island_idx] = best
+    for p in processes:
+        p.join()
+
+    # wybór najlepszego osobnika ze wszystkich wysp
+    teacher_preferences = None
+    if preferences_path:
+        with open(preferences_path) as f:
+            teacher_preferences = json.load(f)
+    islands = sorted(k for k, best in bests.items() if best is not None)
+    if not islands:
+        print("Żadna wyspa nie zwróciła wyniku.")
+        return
+    fitness_data = build_fitness_data(instance.c, instance.t, instance.r, instance.ts, instance.g_c_mapping,
+                                      teacher_preferences)
+    values = population_fitness(np.stack([bests[k] for k in islands]), fitness_data, w)
+    for k, value in zip(islands, values.tolist()):
+        print(f"wyspa {k}: najlepsza wartość funkcji celu {value}")
+    best = bests[islands[int(np.argmin(values))]]
+    os.makedirs(output_dir, exist_ok=True)
+    save_best(f'{output_dir}/best.npz', best, instance.t, instance.r, instance.ts)
+    return best
+
+
+if __name__ == "__main__":
+
+    course_data = open_json("Final_load_data/merged_filtered_course_data.json")
+    rooms_type_mapping_data = open_json("Final_load_data/final_class_type_to_rooms.json")
+
+    time_slots = [
+        "Pon 7:30", "Pon 9:15", "Pon 11:15", "Pon 13:15", "Pon 15:15", "Pon 17:05", "Pon 18:45",
+        "Wto 7:30", "Wto 9:15", "Wto 11:15", "Wto 13:15", "Wto 15:15", "Wto 17:05", "Wto 18:45",
+        "Śro 7:30", "Śro 9:15", "Śro 11:15", "Śro 13:15", "Śro 15:15", "Śro 17:05", "Śro 18:45",
+        "Czw 7:30", "Czw 9:15", "Czw 11:15", "Czw 13:15", "Czw 15:15", "Czw 17:05", "Czw 18:45",
+        "Pią 7:30", "Pią 9:15", "Pią 11:15", "Pią 13:15", "Pią 15:15", "Pią 17:05", "Pią 18:45",
+    ]
+
+    instance = create_instance(course_data, rooms_type_mapping_data, len(time_slots))
+
+    n_islands = max(2, os.cpu_count() or 4)
+    solution = island_genetic_algorithm(
+        instance=instance,
+        population_size=20,
+        generations=100,
+        mutation_rate=[0.05 + 0.2 * k / max(1, n_islands - 1) for k in range(n_islands)],
+        saving_every=5,
+        n_islands=n_islands,
+        migration_every=5,
+        migration_size=2,
+        topology='ring',
+        preferences_path="teacher_preferences2.json",
+    )
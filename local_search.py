@@ -0,0 +1,193 @@
+import math
+import random
+import time
+from collections import deque
+from occupancy import occupied_table_from_individual, course_assignment, course_release, random_possible_assignment, \
+    is_assignment_free
+from fitness_evaluation import DeltaEvaluator
+
+
+def is_conflict_free(individual, instance):
+    """
+        Sprawdzenie, czy żaden prowadzący, pokój ani grupa nie są zajęci dwa razy w tym samym oknie czasowym.
+    """
+    seen_t, seen_r, seen_g = set(), set(), set()
+    for c_idx, (t_idx, r_idx, ts_idx) in enumerate(individual.tolist()):
+        if t_idx < 0:
+            continue
+        if (t_idx, ts_idx) in seen_t or (r_idx, ts_idx) in seen_r:
+            return False
+        seen_t.add((t_idx, ts_idx))
+        seen_r.add((r_idx, ts_idx))
+        for g_idx in instance.course_groups[c_idx]:
+            if (g_idx, ts_idx) in seen_g:
+                return False
+            seen_g.add((g_idx, ts_idx))
+    return True
+
+
+def propose_course_move(individual, occ, c_idx, instance):
+    """
+        Ruch przeniesienia kursu na losowe wolne przypisanie (prowadzący, pokój, okno czasowe).
+        Zwraca None, gdy nie istnieje inne dopuszczalne przypisanie.
+    """
+    old = individual[c_idx].tolist()
+    course_release(individual, c_idx, occ, instance)
+    a = random_possible_assignment(c_idx, occ, instance)
+    course_assignment(individual, c_idx, occ, old, instance)
+    if a is None or list(a) == old:
+        return None
+    return ('assign', c_idx, *a)
+
+
+def propose_course_swap(individual, occ, c_idx1, c_idx2, instance):
+    """
+        Ruch zamiany okien czasowych dwóch kursów (prowadzący i pokoje bez zmian).
+        Zwraca None, gdy zamiana naruszyłaby ograniczenia.
+    """
+    a1 = individual[c_idx1].tolist()
+    a2 = individual[c_idx2].tolist()
+    if a1[2] == a2[2]:
+        return None
+    new1 = (a1[0], a1[1], a2[2])
+    new2 = (a2[0], a2[1], a1[2])
+    course_release(individual, c_idx1, occ, instance)
+    course_release(individual, c_idx2, occ, instance)
+    feasible = is_assignment_free(occ, c_idx1, new1, instance) and is_assignment_free(occ, c_idx2, new2, instance)
+    course_assignment(individual, c_idx1, occ, a1, instance)
+    course_assignment(individual, c_idx2, occ, a2, instance)
+    if not feasible:
+        return None
+    return ('changes', [(c_idx1, new1), (c_idx2, new2)])
+
+
+def random_move(individual, occ, courses, instance, swap_probability=0.5):
+    """
+        Losowy ruch z sąsiedztwa: przeniesienie jednego kursu lub zamiana okien dwóch kursów.
+    """
+    if len(courses) > 1 and random.random() < swap_probability:
+        c_idx1, c_idx2 = random.sample(courses, 2)
+        return propose_course_swap(individual, occ, c_idx1, c_idx2, instance)
+    return propose_course_move(individual, occ, random.choice(courses), instance)
+
+
+def apply_move(evaluator, occ, move, instance):
+    """
+        Wykonanie ruchu na osobniku, w ewaluatorze przyrostowym oraz w tablicach zajęcia.
+    """
+    individual = evaluator.individual
+    changes = evaluator.move_changes(move)
+    old = [(c_idx, individual[c_idx].tolist()) for c_idx, _ in changes]
+    for c_idx, _ in changes:
+        course_release(individual, c_idx, occ, instance)
+    # ewaluator musi zobaczyć poprzednie przypisania, żeby wyznaczyć dotknięte dni
+    for c_idx, a in old:
+        individual[c_idx] = a
+    diff = evaluator.apply(('changes', changes))
+    for c_idx, a in changes:
+        course_assignment(individual, c_idx, occ, a, instance)
+    return diff
+
+
+def moved_courses(move):
+    if move[0] == 'assign':
+        return [move[1]]
+    return [c_idx for c_idx, _ in move[1]]
+
+
+def simulated_annealing(evaluator, occ, courses, instance, max_steps, deadline, temperature=2.0, cooling=0.99,
+                        swap_probability=0.5):
+    """
+        Symulowane wyżarzanie. Zwraca najlepszą znalezioną kopię osobnika i jej wartość.
+    """
+    current = evaluator.value()
+    best, best_value = evaluator.individual.copy(), current
+    for _ in range(max_steps):
+        if deadline is not None and time.time() > deadline:
+            break
+        move = random_move(evaluator.individual, occ, courses, instance, swap_probability)
+        temperature *= cooling
+        if move is None:
+            continue
+        d = evaluator.delta(move)
+        if d <= 0 or random.random() < math.exp(-d / max(temperature, 1e-9)):
+            current += apply_move(evaluator, occ, move, instance)
+            if current < best_value - 1e-9:
+                best, best_value = evaluator.individual.copy(), current
+    return best, best_value
+
+
+def tabu_search(evaluator, occ, courses, instance, max_steps, deadline, tenure=10, candidates=20,
+                swap_probability=0.5):
+    """
+        Przeszukiwanie tabu: w każdym kroku wykonywany jest najlepszy z candidates losowych ruchów,
+        który nie dotyczy kursów z listy tabu (chyba że poprawia najlepsze rozwiązanie).
+        Zwraca najlepszą znalezioną kopię osobnika i jej wartość.
+    """
+    current = evaluator.value()
+    best, best_value = evaluator.individual.copy(), current
+    tabu = deque(maxlen=tenure)
+    for _ in range(max_steps):
+        if deadline is not None and time.time() > deadline:
+            break
+        chosen, chosen_delta = None, math.inf
+        for _ in range(candidates):
+            move = random_move(evaluator.individual, occ, courses, instance, swap_probability)
+            if move is None:
+                continue
+            d = evaluator.delta(move)
+            is_tabu = any(c_idx in tabu for c_idx in moved_courses(move))
+            if (not is_tabu or current + d < best_value - 1e-9) and d < chosen_delta:
+                chosen, chosen_delta = move, d
+        if chosen is None:
+            continue
+        current += apply_move(evaluator, occ, chosen, instance)
+        tabu.extend(moved_courses(chosen))
+        if current < best_value - 1e-9:
+            best, best_value = evaluator.individual.copy(), current
+    return best, best_value
+
+
+def local_search(individual, fitness_data, w, instance, method='sa', max_steps=200, time_budget=None, **params):
+    """
+        Lokalne ulepszanie zwartego osobnika (c, 3) ruchami zachowującymi ograniczenia twarde,
+        ocenianymi przyrostowo (DeltaEvaluator). method: 'sa' (wyżarzanie) lub 'tabu'.
+        Osobnik jest modyfikowany w miejscu; zwracana jest zmiana wartości funkcji celu.
+    """
+    if not is_conflict_free(individual, instance):
+        return 0.0
+    courses = [c_idx for c_idx in range(individual.shape[0]) if individual[c_idx, 0] >= 0]
+    if not courses:
+        return 0.0
+    deadline = time.time() + time_budget if time_budget is not None else None
+    occ = occupied_table_from_individual(individual, instance)
+    evaluator = DeltaEvaluator(individual.copy(), fitness_data, w)
+    start_value = evaluator.value()
+    if method == 'sa':
+        best, best_value = simulated_annealing(evaluator, occ, courses, instance, max_steps, deadline, **params)
+    elif method == 'tabu':
+        best, best_value = tabu_search(evaluator, occ, courses, instance, max_steps, deadline, **params)
+    else:
+        raise ValueError(f"Nieznana metoda przeszukiwania lokalnego: {method}")
+    individual[:] = best
+    return best_value - start_value
+
+
+def improve_population(population, indices, fitness_data, w, instance, method='sa', max_steps=200, time_budget=None,
+                       **params):
+    """
+        Przeszukiwanie lokalne dla wybranych osobników populacji (n, c, 3).
+        time_budget to łączny czas (w sekundach) na całą populację, dzielony równo między pozostałe osobniki.
+        Zwraca łączną zmianę wartości funkcji celu.
+    """
+    indices = list(indices)
+    deadline = time.time() + time_budget if time_budget is not None else None
+    total = 0.0
+    for k, i in enumerate(indices):
+        budget = None
+        if deadline is not None:
+            budget = (deadline - time.time()) / (len(indices) - k)
+            if budget <= 0:
+                break
+        total += local_search(population[i], fitness_data, w, instance, method, max_steps, budget, **params)
+    return total
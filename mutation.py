@@ -0,0 +1,175 @@
+import random
+import time
+import numpy as np
+from occupancy import occupied_table_from_individual, course_assignment, course_release, is_assignment_free
+from local_search import propose_course_swap
+
+
+def random_assigned_course(individual):
+    """
+        Losowy kurs osobnika (None, gdy wylosowany kurs jest nieprzypisany).
+    """
+    c_idx = random.randrange(individual.shape[0])
+    if individual[c_idx, 0] < 0:
+        return None
+    return c_idx
+
+
+def apply_changes(individual, occ, changes, instance):
+    """
+        Wykonanie zestawu nowych przypisań [(c_idx, (t, r, ts)), ...] na osobniku i tablicach zajęcia.
+        Gdy którekolwiek przypisanie koliduje z resztą planu, zmiany są wycofywane i zwracane jest False.
+    """
+    old = [(c_idx, individual[c_idx].tolist()) for c_idx, _ in changes]
+    for c_idx, _ in changes:
+        course_release(individual, c_idx, occ, instance)
+    done = []
+    for c_idx, a in changes:
+        if not is_assignment_free(occ, c_idx, a, instance):
+            for c_done in done:
+                course_release(individual, c_done, occ, instance)
+            for c_old, a_old in old:
+                course_assignment(individual, c_old, occ, a_old, instance)
+            return False
+        course_assignment(individual, c_idx, occ, a, instance)
+        done.append(c_idx)
+    return True
+
+
+def mutate_move_course(individual, occ, instance, attempts=10):
+    """
+        Przeniesienie losowego kursu do innego okna czasowego i/lub pokoju (prowadzący bez zmian).
+        Każda próba sprawdzana jest w czasie stałym na maskach zajętości.
+    """
+    c_idx = random_assigned_course(individual)
+    if c_idx is None:
+        return False
+    t_idx, r_idx, ts_idx = individual[c_idx].tolist()
+    rooms = instance.course_rooms[c_idx]
+    for _ in range(attempts):
+        a = (t_idx, int(rooms[random.randrange(rooms.size)]), random.randrange(instance.ts))
+        if a != (t_idx, r_idx, ts_idx) and apply_changes(individual, occ, [(c_idx, a)], instance):
+            return True
+    return False
+
+
+def mutate_swap_courses(individual, occ, instance, attempts=10):
+    """
+        Zamiana okien czasowych dwóch losowych kursów (prowadzący i pokoje bez zmian).
+    """
+    for _ in range(attempts):
+        c_idx1 = random_assigned_course(individual)
+        c_idx2 = random_assigned_course(individual)
+        if c_idx1 is None or c_idx2 is None or c_idx1 == c_idx2:
+            continue
+        move = propose_course_swap(individual, occ, c_idx1, c_idx2, instance)
+        if move is not None:
+            return apply_changes(individual, occ, move[1], instance)
+    return False
+
+
+def mutate_change_teacher(individual, occ, instance, attempts=10):
+    """
+        Zmiana prowadzącego losowego kursu na innego dopuszczalnego, wolnego w tym samym oknie.
+    """
+    for _ in range(attempts):
+        c_idx = random_assigned_course(individual)
+        if c_idx is None:
+            continue
+        teachers = instance.course_teachers[c_idx]
+        if teachers.size < 2:
+            continue
+        t_idx, r_idx, ts_idx = individual[c_idx].tolist()
+        new_t = int(teachers[random.randrange(teachers.size)])
+        if new_t != t_idx and apply_changes(individual, occ, [(c_idx, (new_t, r_idx, ts_idx))], instance):
+            return True
+    return False
+
+
+def kempe_chain(individual, c_idx, ts_other, instance):
+    """
+        Łańcuch Kempego kursu c_idx między jego oknem czasowym a ts_other: najmniejszy zbiór kursów
+        z obu okien, których zamiana okien nie tworzy konfliktów prowadzących, pokoi ani grup.
+    """
+    ts_start = int(individual[c_idx, 2])
+    slot_of = {ts_start: ts_other, ts_other: ts_start}
+    # zasób (prowadzący, pokój lub grupa) -> kursy, które go używają, osobno dla obu okien
+    users = {ts_start: {}, ts_other: {}}
+    courses = np.flatnonzero((individual[:, 0] >= 0) & np.isin(individual[:, 2], (ts_start, ts_other)))
+    resources = {}
+    for course in courses.tolist():
+        t_idx, r_idx, ts_idx = individual[course].tolist()
+        resources[course] = [('t', t_idx), ('r', r_idx)] + [('g', g_idx) for g_idx in instance.course_groups[course]]
+        for resource in resources[course]:
+            users[ts_idx].setdefault(resource, []).append(course)
+    chain = {c_idx}
+    queue = [c_idx]
+    while queue:
+        course = queue.pop()
+        other = slot_of[int(individual[course, 2])]
+        for resource in resources[course]:
+            for neighbour in users[other].get(resource, []):
+                if neighbour not in chain:
+                    chain.add(neighbour)
+                    queue.append(neighbour)
+    return sorted(chain)
+
+
+def mutate_kempe_chain(individual, occ, instance):
+    """
+        Zamiana okien czasowych kursów łańcucha Kempego wyznaczonego przez losowy kurs i losowe inne okno.
+    """
+    c_idx = random_assigned_course(individual)
+    if c_idx is None:
+        return False
+    ts_idx = int(individual[c_idx, 2])
+    ts_other = random.randrange(instance.ts - 1)
+    ts_other += ts_other >= ts_idx
+    changes = []
+    for course in kempe_chain(individual, c_idx, ts_other, instance):
+        t_idx, r_idx, ts_course = individual[course].tolist()
+        changes.append((course, (t_idx, r_idx, ts_other if ts_course == ts_idx else ts_idx)))
+    return apply_changes(individual, occ, changes, instance)
+
+
+# Operatory mutacji na poziomie kursów: nazwa -> funkcja(osobnik, tablice zajęcia, instancja) -> czy wykonano ruch
+MUTATION_OPERATORS = {
+    'move': mutate_move_course,
+    'swap': mutate_swap_courses,
+    'teacher': mutate_change_teacher,
+    'kempe': mutate_kempe_chain,
+}
+
+
+def mutate_courses(population, instance, rates):
+    """
+        Mutacje na poziomie kursów dla zwartej populacji (n, c, 3), wykonywane w miejscu.
+        rates - słownik {operator: współczynnik} (klucze z MUTATION_OPERATORS); współczynnik to oczekiwana
+        liczba wywołań operatora na osobnika (dla wartości <= 1 - prawdopodobieństwo wywołania).
+        Zwraca słownik {operator: (liczba wywołań, liczba wykonanych ruchów, czas procesora [s])}
+        oraz tablicę (n, len(rates)) liczby wykonanych ruchów każdego operatora na każdym osobniku.
+    """
+    names = list(rates)
+    for name in names:
+        if name not in MUTATION_OPERATORS:
+            raise ValueError(f"Nieznany operator mutacji: {name}")
+    calls_count = [0] * len(names)
+    cpu_times = [0.0] * len(names)
+    moves = np.zeros((population.shape[0], len(names)), dtype=np.int64)
+    for i, individual in enumerate(population):
+        calls = []
+        for k, name in enumerate(names):
+            rate = rates[name]
+            calls += [k] * (int(rate) + (random.random() < rate - int(rate)))
+        if not calls:
+            continue
+        random.shuffle(calls)
+        occ = occupied_table_from_individual(individual, instance)
+        for k in calls:
+            start = time.process_time()
+            moved = MUTATION_OPERATORS[names[k]](individual, occ, instance)
+            cpu_times[k] += time.process_time() - start
+            calls_count[k] += 1
+            moves[i, k] += bool(moved)
+    stats = {name: (calls_count[k], int(moves[:, k].sum()), cpu_times[k]) for k, name in enumerate(names)}
+    return stats, moves
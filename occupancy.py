@@ -0,0 +1,127 @@
+import numpy as np
+import random
+
+
+def get_occupied_table(instance):
+    """
+        Funkcja tworząca słownik z tablicami zajęcia.
+        Zajętość każdego prowadzącego, pokoju i grupy zapisana jest jako maska bitowa okien czasowych
+        (bit ts_idx ustawiony - okno zajęte), dlatego liczba okien czasowych nie może przekraczać 63.
+        Maski grup przechowywane są w liście indeksowanej numerem grupy (instance.course_groups).
+    """
+    return {
+        't': np.zeros(instance.t, dtype=np.int64),
+        'r': np.zeros(instance.r, dtype=np.int64),
+        'g': [0] * instance.n_groups,
+        'all': (1 << instance.ts) - 1,
+    }
+
+
+def popcount(masks):
+    """
+        Liczba ustawionych bitów w każdym elemencie tablicy masek.
+    """
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks)
+    return ((masks[..., np.newaxis] >> np.arange(63)) & 1).sum(axis=-1)
+
+
+def nth_set_bit(mask, n):
+    """
+        Indeks n-tego (licząc od 0) ustawionego bitu maski.
+    """
+    for _ in range(n):
+        mask &= mask - 1
+    return (mask & -mask).bit_length() - 1
+
+
+def is_assignment_free(occ, c_idx, a, instance):
+    """
+        Sprawdzenie, czy prowadzący, pokój i grupy kursu są wolne w danym oknie czasowym.
+    """
+    t_idx, r_idx, ts_idx = a
+    busy = int(occ['t'][t_idx]) | int(occ['r'][r_idx])
+    for g_idx in instance.course_groups[c_idx]:
+        busy |= occ['g'][g_idx]
+    return not (busy >> int(ts_idx)) & 1
+
+
+def course_assignment(ind, c_idx, occ, a, instance):
+    """
+        Funkcja przypisująca kurs oraz zapisująca tablice zajęcia.
+    """
+    t_idx, r_idx, ts_idx = a
+    ind[c_idx] = a
+    bit = 1 << int(ts_idx)
+    occ['t'][t_idx] |= bit
+    occ['r'][r_idx] |= bit
+    for g_idx in instance.course_groups[c_idx]:
+        occ['g'][g_idx] |= bit
+    return ind, occ
+
+
+def course_release(ind, c_idx, occ, instance):
+    """
+        Funkcja usuwająca przypisanie kursu oraz zwalniająca tablice zajęcia.
+    """
+    t_idx, r_idx, ts_idx = ind[c_idx].tolist()
+    if t_idx >= 0:
+        bit = 1 << ts_idx
+        occ['t'][t_idx] &= ~bit
+        occ['r'][r_idx] &= ~bit
+        for g_idx in instance.course_groups[c_idx]:
+            occ['g'][g_idx] &= ~bit
+        ind[c_idx] = -1
+    return ind, occ
+
+
+def random_possible_assignment(c_idx, occ, instance):
+    """
+        Losowanie trójki (t, r, ts) z rozkładu jednostajnego na zbiorze możliwych przypisań kursu.
+        Zbiór ten wyznaczany jest operacjami AND na maskach zajętości (bez tworzenia listy kandydatów).
+        Zwraca None, gdy żadne przypisanie nie jest możliwe.
+    """
+    allowed_t = instance.course_teachers[c_idx]
+    allowed_r = instance.course_rooms[c_idx]
+    if allowed_t.size == 0 or allowed_r.size == 0:
+        return None
+    busy_g = 0
+    for g_idx in instance.course_groups[c_idx]:
+        busy_g |= occ['g'][g_idx]
+    free_t = ~(occ['t'][allowed_t] | busy_g) & occ['all']
+    free_r = ~occ['r'][allowed_r] & occ['all']
+    free = (free_t[:, np.newaxis] & free_r[np.newaxis, :]).ravel()
+    cumulative = np.cumsum(popcount(free))
+    if cumulative[-1] == 0:
+        return None
+    k = random.randrange(int(cumulative[-1]))
+    cell = int(np.searchsorted(cumulative, k, side='right'))
+    if cell:
+        k -= int(cumulative[cell - 1])
+    ts_idx = nth_set_bit(int(free[cell]), k)
+    return int(allowed_t[cell // allowed_r.size]), int(allowed_r[cell % allowed_r.size]), ts_idx
+
+
+def random_possible_course_assignment(ind, c_idx, occ, instance):
+    """
+        Funkcja losująca przypisanie dla danego kursu z listy możliwych przypisań.
+    """
+    a = random_possible_assignment(c_idx, occ, instance)
+    if a is None:
+        return ind, occ
+    return course_assignment(ind, c_idx, occ, a, instance)
+
+
+def occupied_table_from_individual(individual, instance):
+    """
+        Tablice zajęcia odtworzone ze zwartego osobnika (c, 3).
+    """
+    occ = get_occupied_table(instance)
+    c_idx = np.nonzero(individual[:, 0] >= 0)[0]
+    bits = np.left_shift(1, individual[c_idx, 2].astype(np.int64))
+    np.bitwise_or.at(occ['t'], individual[c_idx, 0], bits)
+    np.bitwise_or.at(occ['r'], individual[c_idx, 1], bits)
+    for course, bit in zip(c_idx.tolist(), bits.tolist()):
+        for g_idx in instance.course_groups[course]:
+            occ['g'][g_idx] |= bit
+    return occ
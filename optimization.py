@@ -1,12 +1,27 @@
 import json
 import numpy as np
 import random
-from bisect import bisect_left
-from itertools import accumulate
 import time
+import itertools
 import pickle
 import os
-from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from fitness_evaluation import COMPONENTS, build_fitness_data, population_fitness_components, PopulationEvaluator
+from occupancy import get_occupied_table, is_assignment_free, course_assignment, random_possible_course_assignment, \
+    occupied_table_from_individual
+from local_search import improve_population
+from mutation import mutate_courses, MUTATION_OPERATORS
+from adaptive_mutation import AdaptiveMutation, population_diversity
+from profiling import PhaseTimer, format_phase_times
+from events import EventLog, objective_summary
+from construction import construct_individual
+from instance import Instance
+from checkpoint import CHECKPOINT_FILE, CheckpointWriter, checkpoint_state, write_pickle, load_checkpoint, \
+    restore_random_state
+
+
+# Typ zwartego kodowania osobnika: jedna trójka (prowadzący, pokój, okno czasowe) na kurs
+COMPACT_DTYPE = np.int16
 
 
 def open_json(file_name):
@@ -28,20 +43,23 @@ def create_c_t_mapping(data, c_s, t_s):
     return mapping
 
 
+# Typy sal, w których mogą odbywać się zajęcia danego rodzaju
+CLASS_TYPE_TO_ROOM_TYPE = {
+    "wykład": ["SALA_WYK_MALA"],
+    "ćwiczenia": ["SALA_CW"],
+    "laboratorium": ["LAB_SPEC", "LAB_KOMP"],
+    "projekt": ["LAB_SPEC", "LAB_KOMP", "SALA_CW"],
+    "seminarium": ["SALA_SEM", "SALA_WYK_MALA"],
+}
+
+
 def create_c_r_mapping(r_data, c_data, r_s, c_s):
     """
         Wstępna transformacja informacji kurs->pokój.
     """
-    class_type_to_room_type = {
-        "wykład": ["SALA_WYK_MALA"],
-        "ćwiczenia": ["SALA_CW"],
-        "laboratorium": ["LAB_SPEC", "LAB_KOMP"],
-        "projekt": ["LAB_SPEC", "LAB_KOMP", "SALA_CW"],
-        "seminarium": ["SALA_SEM", "SALA_WYK_MALA"],
-    }
     room_name_to_idx = {room: idx for idx, room in enumerate(r_s)}
     class_types_rooms_mapping = {}
-    for class_type, room_type_list in class_type_to_room_type.items():
+    for class_type, room_type_list in CLASS_TYPE_TO_ROOM_TYPE.items():
         class_types_rooms_mapping[class_type] = [
             room_name_to_idx[room]
             for room_type in room_type_list
@@ -66,6 +84,65 @@ def create_g_c_mapping(data, c_s):
     return mapping
 
 
+def create_instance(c_data, r_data, ts, days=5):
+    """
+        Budowa obiektu Instance (instance.py) bezpośrednio z danych kursów i sal.
+        Kursy, prowadzący i pokoje są sortowane tak samo jak w skryptach uruchomieniowych.
+    """
+    courses = sorted(c_data.keys())
+    teachers = sorted(set(v for course in c_data.values() for v in course.get("lecturers", [])))
+    rooms = sorted(set(v for l in r_data.values() for v in l))
+    room_name_to_idx = {room: idx for idx, room in enumerate(rooms)}
+    rooms_by_type = {room_type: [room_name_to_idx[room] for room in room_list] for room_type, room_list in r_data.items()}
+    return Instance(
+        len(courses), len(teachers), len(rooms), ts,
+        create_c_t_mapping(c_data, courses, teachers),
+        create_c_r_mapping(r_data, c_data, rooms, courses),
+        create_g_c_mapping(c_data, courses),
+        rooms_by_type=rooms_by_type,
+        days=days,
+        names={'courses': courses, 'teachers': teachers, 'rooms': rooms},
+    )
+
+
+def dense_to_compact(sol):
+    """
+        Zamiana gęstej macierzy (c, t, r, ts) na zwartą tablicę (c, 3) trójek (prowadzący, pokój, okno czasowe).
+        Kursy nieprzypisane oznaczone są wartością -1.
+    """
+    ind = np.full((sol.shape[0], 3), -1, dtype=COMPACT_DTYPE)
+    c_idx, t_idx, r_idx, ts_idx = np.nonzero(sol)
+    c_idx, first = np.unique(c_idx, return_index=True)
+    ind[c_idx, 0] = t_idx[first]
+    ind[c_idx, 1] = r_idx[first]
+    ind[c_idx, 2] = ts_idx[first]
+    return ind
+
+
+def compact_to_dense(ind, t, r, ts):
+    """
+        Zamiana zwartej tablicy (c, 3) na gęstą macierz (c, t, r, ts).
+    """
+    sol = np.zeros((ind.shape[0], t, r, ts), dtype=bool)
+    c_idx = np.nonzero(ind[:, 0] >= 0)[0]
+    sol[c_idx, ind[c_idx, 0], ind[c_idx, 1], ind[c_idx, 2]] = True
+    return sol
+
+
+def population_to_compact(population):
+    """
+        Zamiana gęstej populacji (c, t, r, ts, n) na zwartą populację (n, c, 3).
+    """
+    return np.stack([dense_to_compact(population[:, :, :, :, i]) for i in range(population.shape[-1])])
+
+
+def compact_to_population(population, t, r, ts):
+    """
+        Zamiana zwartej populacji (n, c, 3) na gęstą populację (c, t, r, ts, n).
+    """
+    return np.stack([compact_to_dense(ind, t, r, ts) for ind in population], axis=-1)
+
+
 def print_numbers(c, t, r, ts, n):
     """
         Wypisanie wymiarów macierzy.
@@ -77,7 +154,7 @@ def print_numbers(c, t, r, ts, n):
     print()
 
 
-def print_constraints_values(sol, g_c_mapping, c_t_mapping, c_r_mapping):
+def print_constraints_values(sol, instance):
     """
         Wypisanie liczby naruszeń wszystkich ograniczeń
     """
@@ -87,13 +164,13 @@ def print_constraints_values(sol, g_c_mapping, c_t_mapping, c_r_mapping):
     print("prowadzący więcej niż raz")
     print(teacher_conflicts_constraint_n(sol))
     print("grupa studencka więcej niż raz")
-    print(student_groups_conflicts_constraint_n(sol, g_c_mapping))
+    print(student_groups_conflicts_constraint_n(sol, instance))
     print("kurs nieprzypisany lub więcej niż raz")
     print(all_courses_assigned_once_constraint_n(sol))
     print("nieprawidłowy prowadzący")
-    print(courses_assigned_to_teachers_constraint_n(sol, c_t_mapping))
+    print(courses_assigned_to_teachers_constraint_n(sol, instance))
     print("nieprawidłowy pokój")
-    print(courses_assigned_to_rooms_constraint_n(sol, c_r_mapping))
+    print(courses_assigned_to_rooms_constraint_n(sol, instance))
 
 
 def room_conflicts_constraint(sol):
@@ -126,27 +203,19 @@ def teacher_conflicts_constraint_n(sol):
     return np.maximum(0, sol.sum(axis=(0, 2)) - 1).sum()
 
 
-def student_groups_conflicts_constraint(sol, g_c_mapping):
+def student_groups_conflicts_constraint(sol, instance):
     """
         Jeda grupa studencka nie może mieć więcej niż jeden kurs w tym samym momencie.
     """
-    sol_reduced = sol.sum(axis=(1, 2))
-    for g in g_c_mapping.keys():
-        if np.any(sol_reduced[g_c_mapping[g], :].sum(axis=0) > 1):
-            return False
-    return True
+    return np.all(instance.group_load(sol.sum(axis=(1, 2))) <= 1)
 
 
-def student_groups_conflicts_constraint_n(sol, g_c_mapping):
+def student_groups_conflicts_constraint_n(sol, instance):
     """
         Jeda grupa studencka nie może mieć więcej niż jeden kurs w tym samym momencie.
         Zwraca liczbę naruszeń ograniczenia.
     """
-    sol_reduced = sol.sum(axis=(1, 2))
-    total = 0
-    for g in g_c_mapping.keys():
-        total += np.maximum(0, sol_reduced[g_c_mapping[g], :].sum(axis=0) - 1).sum()
-    return total
+    return np.maximum(0, instance.group_load(sol.sum(axis=(1, 2))) - 1).sum()
 
 
 def all_courses_assigned_once_constraint(sol):
@@ -164,50 +233,34 @@ def all_courses_assigned_once_constraint_n(sol):
     return np.abs(sol.sum(axis=(1, 2, 3)) - 1).sum()
 
 
-def courses_assigned_to_teachers_constraint(sol, c_t_mapping):
+def courses_assigned_to_teachers_constraint(sol, instance):
     """
         Kurs może być prowadzony tylko przez konkretnych prowadzących.
     """
-    sol_reduced = sol.sum(axis=(2, 3))
-    for c_idx in range(sol_reduced.shape[0]):
-        if not np.all(np.isin(np.nonzero(sol_reduced[c_idx])[0], c_t_mapping.get(c_idx, []))):
-            return False
-    return True
+    return not np.any((sol.sum(axis=(2, 3)) > 0) & ~instance.teacher_mask)
 
 
-def courses_assigned_to_teachers_constraint_n(sol, c_t_mapping):
+def courses_assigned_to_teachers_constraint_n(sol, instance):
     """
         Kurs może być prowadzony tylko przez konkretnych prowadzących.
         Zwraca liczbę naruszeń ograniczenia.
     """
-    sol_reduced = sol.sum(axis=(2, 3))
-    total = 0
-    for c_idx in range(sol_reduced.shape[0]):
-        total += np.sum(~np.isin(np.nonzero(sol_reduced[c_idx])[0], c_t_mapping.get(c_idx, [])))
-    return total
+    return np.sum((sol.sum(axis=(2, 3)) > 0) & ~instance.teacher_mask)
 
 
-def courses_assigned_to_rooms_constraint(sol, c_r_mapping):
+def courses_assigned_to_rooms_constraint(sol, instance):
     """
         Kurs musi być prowadzony w salach odpowiadających typowi kursu.
     """
-    sol_reduced = sol.sum(axis=(1, 3))
-    for c_idx in range(sol_reduced.shape[0]):
-        if not np.all(np.isin(np.nonzero(sol_reduced[c_idx])[0], c_r_mapping.get(c_idx, []))):
-            return False
-    return True
+    return not np.any((sol.sum(axis=(1, 3)) > 0) & ~instance.room_mask)
 
 
-def courses_assigned_to_rooms_constraint_n(sol, c_r_mapping):
+def courses_assigned_to_rooms_constraint_n(sol, instance):
     """
         Kurs musi być prowadzony w salach odpowiadających typowi kursu.
         Zwraca liczbę naruszeń ograniczenia.
     """
-    sol_reduced = sol.sum(axis=(1, 3))
-    total = 0
-    for c_idx in range(sol_reduced.shape[0]):
-        total += np.sum(~np.isin(np.nonzero(sol_reduced[c_idx])[0], c_r_mapping.get(c_idx, [])))
-    return total
+    return np.sum((sol.sum(axis=(1, 3)) > 0) & ~instance.room_mask)
 
 
 def count_teaching_days(sol):
@@ -422,325 +475,553 @@ def fitness(sol, c_t_mapping, c_r_mapping, g_c_mapping, w=(2.0, 2.0, 1.0, 1.0, 1
     )
 
 
-# Top-level helper functions (outside any other function)
-def compute_gaps_wrapper(sol):
-    return count_gaps(sol)
-
-
-def compute_group_gaps_wrapper(sol, g_c_mapping):
-    return count_group_gaps(sol, g_c_mapping)
-
-
-def compute_preferences_wrapper(sol, teacher_preferences):
-    return count_preference_penalty_sparse(sol, teacher_preferences) if teacher_preferences else 0
-
-
-def compute_teacher_room_changes_wrapper(sol):
-    return count_room_changes(sol)
-
+def parallel_fitness(sol, c_t_mapping, c_r_mapping, g_c_mapping, w=(3.0, 2.0, 1.0, 1.0, 0.3), teacher_preferences=None, verbose=False):
+    """
+        Ewaluacja pojedynczego gęstego osobnika przy pomocy wektorowego jądra fitness_evaluation.
+        Do ewaluacji całych populacji służy PopulationEvaluator.
+    """
+    c, t, r, ts = sol.shape
+    fitness_data = build_fitness_data(c, t, r, ts, g_c_mapping, teacher_preferences)
+    components = population_fitness_components(dense_to_compact(sol)[np.newaxis], fitness_data)[0]
 
-def compute_group_room_changes_wrapper(sol, g_c_mapping):
-    return count_group_room_changes(sol, g_c_mapping)
+    if verbose:
+        print(dict(zip(COMPONENTS, components.tolist())))
 
+    return float(components @ np.asarray(w, dtype=float))
 
-def parallel_fitness(sol, c_t_mapping, c_r_mapping, g_c_mapping, w=(3.0, 2.0, 1.0, 1.0, 0.3), teacher_preferences=None, verbose=False):
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        futures = {
-            'gaps': executor.submit(compute_gaps_wrapper, sol),
-            #'group_gaps': executor.submit(compute_group_gaps_wrapper, sol, g_c_mapping),
-            #'prefs': executor.submit(compute_preferences_wrapper, sol, teacher_preferences),
-            #'room_changes': executor.submit(compute_teacher_room_changes_wrapper, sol),
-            #'group_room_changes': executor.submit(compute_group_room_changes_wrapper, sol, g_c_mapping),
-        }
 
-        results = {k: f.result() for k, f in futures.items()}
+def generate_population_satisfying_constraints(instance, population_size, method='dsatur', max_backtracks=200):
+    """
+        Populacja generowana w sposób pozwalający wstępnie spełnić ograniczenia.
+        method: 'dsatur' - kursy w kolejności najbardziej ograniczonych, z kontrolą w przód i ograniczonymi
+                nawrotami (construction.py), 'random' - kursy w kolejności indeksów z losowym przypisaniem.
+        Zwraca zwartą populację (n, c, 3).
+    """
+    population = np.full((population_size, instance.c, 3), -1, dtype=COMPACT_DTYPE)
+    for i in range(population_size):
+        if method == 'dsatur':
+            construct_individual(instance, population[i], max_backtracks=max_backtracks)
+        elif method == 'random':
+            occ = get_occupied_table(instance)
+            for c_idx in range(instance.c):
+                population[i], occ = random_possible_course_assignment(population[i], c_idx, occ, instance)
+        else:
+            raise ValueError(f"Nieznana metoda konstrukcji: {method}")
+    return population
 
-    if verbose:
-        print(results)
 
-    return (
-        w[0] * results['gaps']
-        #w[1] * results['group_gaps'] +
-        #w[2] * results['prefs'] +
-        #w[3] * results['room_changes'] +
-        #w[4] * results['group_room_changes']
-    )
+def roulette_selection(fitness_values, n):
+    """
+        Selekcja ruletkowa (minimalizacja). Zwraca tablicę n indeksów wybranych osobników.
+    """
+    values = np.asarray(fitness_values, dtype=float)
+    # odwracamy wartości fitness, bo chemy je minimalizować
+    scaled = values.max() - values + 1e-2
+    cumulative = np.cumsum(scaled / scaled.sum())
+    return np.minimum(np.searchsorted(cumulative, np.random.random(n)), values.size - 1)
 
 
-def get_occupied_table(t, r, ts, g_c_mapping):
+def tournament_selection(fitness_values, n, k=3):
     """
-        Funkcja tworząca słownik z tablicami zajęcia.
+        Selekcja turniejowa: n turniejów k losowych osobników. Zwraca tablicę n indeksów zwycięzców.
     """
-    return {
-        't': np.zeros((t, ts), dtype=bool),
-        'r': np.zeros((r, ts), dtype=bool),
-        'g': {g: np.zeros(ts, dtype=bool) for g in g_c_mapping.keys()}
-    }
+    values = np.asarray(fitness_values, dtype=float)
+    candidates = np.random.randint(values.size, size=(n, k))
+    return candidates[np.arange(n), np.argmin(values[candidates], axis=1)]
 
 
-def course_assignment(sol, c_idx, occ, a, c_g_mapping):
+def rank_selection(fitness_values, n, pressure=1.5):
     """
-        Funkcja przypisująca kurs oraz zapisująca tablice zajęcia.
+        Selekcja rankingowa z liniowym rozkładem prawdopodobieństwa (pressure z przedziału [1, 2]).
+        Zwraca tablicę n indeksów wybranych osobników.
     """
-    t_idx, r_idx, ts_idx = a
-    sol[c_idx, t_idx, r_idx, ts_idx] = True
-    occ['t'][t_idx, ts_idx] = True
-    occ['r'][r_idx, ts_idx] = True
-    for g in c_g_mapping[c_idx]:
-        occ['g'][g][ts_idx] = True
-    return sol, occ
+    values = np.asarray(fitness_values, dtype=float)
+    size = values.size
+    if size == 1:
+        return np.zeros(n, dtype=np.intp)
+    ranks = np.empty(size, dtype=float)
+    ranks[np.argsort(values)] = np.arange(size)
+    probabilities = (2 - pressure) / size + 2 * (pressure - 1) * (size - 1 - ranks) / (size * (size - 1))
+    return np.random.choice(size, size=n, p=probabilities / probabilities.sum())
 
 
-def random_possible_course_assignment(sol, c_idx, occ, c_t_mapping, c_r_mapping, c_g_mapping):
+def elite_indices(fitness_values, elite_count):
     """
-        Funkcja losująca przypisanie dla danego kursu z listy możliwych przypisań.
+        Indeksy elite_count najlepszych osobników.
     """
-    allowed_t = c_t_mapping[c_idx]
-    allowed_r = c_r_mapping[c_idx]
-    groups = c_g_mapping[c_idx]
-    possible = []
-    for t_idx in allowed_t:
-        for r_idx in allowed_r:
-            for ts_idx in range(occ['r'].shape[1]):
-                if not occ['r'][r_idx, ts_idx] and not occ['t'][t_idx, ts_idx]:
-                    if all(not occ['g'][g][ts_idx] for g in groups):
-                        possible.append((t_idx, r_idx, ts_idx))
-    if not possible:
-        return sol, occ
-    return course_assignment(sol, c_idx, occ, random.choice(possible), c_g_mapping)
+    return np.argsort(np.asarray(fitness_values, dtype=float), kind='stable')[:elite_count]
 
 
-def generate_population_satisfying_constraints(c, t, r, ts, population_size, c_t_mapping, c_r_mapping, g_c_mapping, c_g_mapping):
+def select_parents(fitness_values, n, selection='roulette', tournament_size=3):
     """
-        Populacja generowana w sposób pozwalający wstępnie spełnić ograniczenia.
+        Wybór n rodziców wskazaną metodą selekcji ('roulette', 'tournament', 'rank').
     """
-    population = np.zeros((c, t, r, ts, population_size), dtype=bool)
-    for i in range(population_size):
-        occ = get_occupied_table(t, r, ts, g_c_mapping)
-        for c_idx in range(c):
-            population[:, :, :, :, i], occ = random_possible_course_assignment(population[:, :, :, :, i], c_idx, occ, c_t_mapping, c_r_mapping, c_g_mapping)
-    return population
+    if selection == 'roulette':
+        return roulette_selection(fitness_values, n)
+    if selection == 'tournament':
+        return tournament_selection(fitness_values, n, tournament_size)
+    if selection == 'rank':
+        return rank_selection(fitness_values, n)
+    raise ValueError(f"Nieznana metoda selekcji: {selection}")
 
 
-def crossover_advanced(population, g_c_mapping, c_t_mapping, c_r_mapping, c_g_mapping):
+def crossover_advanced(population, instance, parents_idx=None):
     """
         Krzyżowanie populacji poprzez losowe dobieranie kursów od rodziców.
+        Przypisanie kursu u rodzica odczytywane jest wprost ze zwartej tablicy przypisań (O(1) na kurs).
+        parents_idx - indeksy rodziców w population (kolejne pary); rodzice nie są kopiowani ani modyfikowani,
+        więc osobnik wybrany wielokrotnie nie jest powielany. Domyślnie kolejne osobniki populacji.
     """
-    c, t, r, ts, n = population.shape
-    new_population = np.zeros_like(population)
+    if parents_idx is None:
+        parents_idx = np.arange(population.shape[0])
+    n = len(parents_idx)
+    new_population = np.full((n,) + population.shape[1:], -1, dtype=population.dtype)
+    c = population.shape[1]
 
     for i in range(0, n, 2):
-        parent1 = population[:, :, :, :, i]
-        parent2 = population[:, :, :, :, i + 1]
-        child1 = np.zeros((c, t, r, ts), dtype=bool)
-        child2 = np.zeros((c, t, r, ts), dtype=bool)
-        occ1 = get_occupied_table(t, r, ts, g_c_mapping)
-        occ2 = get_occupied_table(t, r, ts, g_c_mapping)
-
-        def find_course_assignment(individual, c_idx):
-            pos = np.argwhere(individual[c_idx])
-            return pos[0] if pos.size > 0 else None
-
-        def is_valid(c_idx, t_idx, r_idx, ts_idx, occ):
-            if occ['r'][r_idx, ts_idx]:
-                return False
-            if occ['t'][t_idx, ts_idx]:
-                return False
-            for g in c_g_mapping[c_idx]:
-                if occ['g'][g][ts_idx]:
-                    return False
-            return True
+        parents = (population[parents_idx[i]].tolist(), population[parents_idx[i + 1]].tolist())
+        children = (new_population[i], new_population[i + 1])
+        occs = (get_occupied_table(instance), get_occupied_table(instance))
+        first_parent = np.random.randint(2, size=c).tolist()
 
         for c_idx in range(c):
-            parents = [parent1, parent2]
-            np.random.shuffle(parents)
-            a1, a2 = find_course_assignment(parents[0], c_idx), find_course_assignment(parents[1], c_idx)
-
-            if a1 is not None and is_valid(c_idx, *a1, occ1):
-                child1, occ1 = course_assignment(child1, c_idx, occ1, a1, c_g_mapping)
-            elif a2 is not None and is_valid(c_idx, *a2, occ1):
-                child1, occ1 = course_assignment(child1, c_idx, occ1, a2, c_g_mapping)
-            else:
-                child1, occ1 = random_possible_course_assignment(child1, c_idx, occ1, c_t_mapping, c_r_mapping, c_g_mapping)
-
-            if a2 is not None and is_valid(c_idx, *a2, occ2):
-                child2, occ2 = course_assignment(child2, c_idx, occ2, a2, c_g_mapping)
-            elif a1 is not None and is_valid(c_idx, *a1, occ2):
-                child2, occ2 = course_assignment(child2, c_idx, occ2, a1, c_g_mapping)
-            else:
-                child2, occ2 = random_possible_course_assignment(child2, c_idx, occ2, c_t_mapping, c_r_mapping, c_g_mapping)
+            a1 = parents[first_parent[c_idx]][c_idx]
+            a2 = parents[1 - first_parent[c_idx]][c_idx]
+
+            # pierwsze dziecko preferuje przypisanie a1, drugie a2
+            for child, occ, preferred in ((children[0], occs[0], (a1, a2)), (children[1], occs[1], (a2, a1))):
+                for a in preferred:
+                    if a[0] >= 0 and is_assignment_free(occ, c_idx, a, instance):
+                        course_assignment(child, c_idx, occ, a, instance)
+                        break
+                else:
+                    random_possible_course_assignment(child, c_idx, occ, instance)
 
-        new_population[:, :, :, :, i] = child1
-        new_population[:, :, :, :, i + 1] = child2
     return new_population
 
 
-def fix_unassigned_courses(population, c_t_mapping, c_r_mapping, c_g_mapping, g_c_mapping):
+def fix_unassigned_courses(population, instance):
     """
         Próba ponownego przypisania kursów, które wcześniej nie zostały przypisane.
     """
-    c, t, r, ts, n = population.shape
-    for i in range(n):
-        individual = population[:, :, :, :, i]
-        occ = get_occupied_table(t, r, ts, g_c_mapping)
-        occ['t'] = np.any(np.any(individual, axis=2), axis=0)
-        occ['r'] = np.any(np.any(individual, axis=1), axis=0)
-        for c_idx in range(c):
-            assignment = np.argwhere(individual[c_idx])
-            if assignment.size > 0:
-                t_idx, r_idx, ts_idx = assignment[0]
-                for g in c_g_mapping[c_idx]:
-                    occ['g'][g][ts_idx] = True
-        for c_idx in range(c):
-            if not np.any(individual[c_idx, :, :, :]):
-                individual, occ = random_possible_course_assignment(individual, c_idx, occ, c_t_mapping, c_r_mapping, c_g_mapping)
+    for individual in population:
+        unassigned = np.nonzero(individual[:, 0] < 0)[0]
+        if unassigned.size == 0:
+            continue
+        occ = occupied_table_from_individual(individual, instance)
+        for c_idx in unassigned.tolist():
+            random_possible_course_assignment(individual, c_idx, occ, instance)
     return population
 
 
-def mutate_swap_timeslots(population, mutation_rate):
+def mutate_swap_timeslots(population, mutation_rate, ts):
     """
         Mutowanie oparte na zamianie dwóch losowych okien czasowych.
     """
-    _, _, _, ts, n = population.shape
+    n = population.shape[0]
     for i in range(n):
         if random.random() < mutation_rate:
             ts_idx1, ts_idx2 = np.random.choice(ts, size=2, replace=False)
-            temp = np.copy(population[:, :, :, ts_idx1, i])
-            population[:, :, :, ts_idx1, i] = population[:, :, :, ts_idx2, i]
-            population[:, :, :, ts_idx2, i] = temp
+            timeslots = population[i, :, 2]
+            in_ts1 = timeslots == ts_idx1
+            in_ts2 = timeslots == ts_idx2
+            timeslots[in_ts1] = ts_idx2
+            timeslots[in_ts2] = ts_idx1
     return population
 
 
-def genetic_algorithm(c, t, r, ts, population_size, c_t_mapping, c_r_mapping, g_c_mapping, generations, mutation_rate, saving_every,
-                      loaded_population=None, output_dir='output', preferences_path=None):
+def save_best(path, best_individual, t, r, ts):
+    """
+        Zapis najlepszego osobnika w postaci gęstej (zgodnej z visualize_individual.py) oraz zwartej.
+    """
+    np.savez_compressed(path, best=compact_to_dense(best_individual, t, r, ts), best_compact=best_individual)
+
+
+def load_best(path):
+    """
+        Odczyt najlepszego osobnika w postaci zwartej (również z plików zawierających tylko postać gęstą).
+    """
+    data = np.load(path)
+    if 'best_compact' in data:
+        return data['best_compact']
+    return dense_to_compact(data['best'])
+
+
+def save_outputs(writer, output_dir, population, best_individual, fitness_history, computing_times, t, r, ts,
+                 logs=None):
+    """
+        Zlecenie zapisu w tle punktu kontrolnego (checkpoint.pkl) oraz plików wynikowych
+        population.npz, best.npz, fitness_history.pkl i computing_times.pkl,
+        a także {nazwa}.pkl dla każdego dziennika ze słownika logs.
+    """
+    state = checkpoint_state(len(computing_times), population, best_individual, fitness_history, computing_times,
+                             logs)
+    write_pickle(writer, f'{output_dir}/{CHECKPOINT_FILE}', state)
+    writer.write(f'{output_dir}/population.npz', partial(np.savez_compressed, population=state['population']))
+    if state['best'] is not None:
+        writer.write(f'{output_dir}/best.npz', partial(save_best, best_individual=state['best'], t=t, r=r, ts=ts))
+    write_pickle(writer, f'{output_dir}/fitness_history.pkl', state['fitness_history'])
+    write_pickle(writer, f'{output_dir}/computing_times.pkl', state['computing_times'])
+    for name, log in state['logs'].items():
+        write_pickle(writer, f'{output_dir}/{name}.pkl', log)
+
+
+def stop_reason(generation, generations, elapsed, last_generation_time, max_time, stall, stall_generations,
+                best_value, target_value):
+    """
+        Powód zakończenia algorytmu przed rozpoczęciem kolejnej generacji lub None, gdy należy kontynuować.
+        Generacja nie jest rozpoczynana, jeśli (sądząc po czasie poprzedniej) nie zmieściłaby się w max_time.
+    """
+    if generations is not None and generation >= generations:
+        return f"wykonano {generations} generacji"
+    if target_value is not None and best_value <= target_value:
+        return f"osiągnięto docelową wartość funkcji celu {target_value}"
+    if stall_generations is not None and stall >= stall_generations:
+        return f"brak poprawy od {stall} generacji"
+    if max_time is not None and elapsed + last_generation_time > max_time:
+        return f"wyczerpano limit czasu {max_time} s"
+    return None
+
+
+def genetic_algorithm(instance, population_size, generations, mutation_rate, saving_every, loaded_population=None,
+                      output_dir='output', preferences_path=None, w=(3.0, 2.0, 1.0, 1.0, 0.3), n_workers=None,
+                      migrate=None, migration_every=None, migration_size=1, local_search_mode=None,
+                      local_search_method='sa', local_search_steps=200, local_search_time=None, local_search_count=2,
+                      selection='roulette', tournament_size=3, elite_count=0, fitness_cache_size=10000,
+                      kernel_backend='auto', mutation_rates=None, construction='dsatur', max_time=None,
+                      stall_generations=None, target_value=None, adaptive_mutation=False,
+                      profile_memory=False, event_log='events.jsonl', verbose=True):
+    """
+        Algorytm genetyczny operujący na zwartej populacji (n, c, 3).
+        instance - dane instancji (instance.Instance, np. z create_instance).
+        Warunki zakończenia (sprawdzane przed każdą generacją, decyduje pierwszy spełniony):
+                  generations - liczba generacji (None - bez limitu), max_time - limit czasu przebiegu [s]
+                  (liczony od wywołania, bez ewaluacji końcowej i zapisu wyników),
+                  stall_generations - liczba kolejnych generacji bez poprawy najlepszego osobnika,
+                  target_value - docelowa wartość funkcji celu.
+                  Po zakończeniu wykonywana jest ewaluacja końcowa i zapis wyników jak po pełnym przebiegu.
+        loaded_population może być zwartą populacją (n, c, 3), gęstą (c, t, r, ts, n)
+                  lub punktem kontrolnym z checkpoint.load_checkpoint (wraz ze stanem generatorów losowych).
+                  Wznowiony przebieg kontynuuje numerację generacji od zapisanej (liczba wpisów computing_times),
+                  więc generations jest łącznym limitem generacji wszystkich przebiegów.
+        construction - metoda tworzenia populacji początkowej: 'dsatur' lub 'random'
+                  (generate_population_satisfying_constraints).
+        w - wagi składowych funkcji celu w kolejności fitness_evaluation.COMPONENTS.
+        n_workers - liczba procesów roboczych ewaluacji (None lub 1 - ewaluacja w bieżącym procesie).
+        fitness_cache_size - rozmiar pamięci podręcznej LRU wartości funkcji celu (0 - wyłączona).
+        kernel_backend - implementacja liczenia 'okienek' i zmian pokoju (fitness_kernels.py):
+                  'auto', 'numpy' lub 'numba'.
+        migrate - funkcja migrate(emigranci, generacja) -> imigranci lub None (model wyspowy, island_model.py);
+                  co migration_every generacji przekazywanych jest migration_size najlepszych osobników,
+                  a otrzymani imigranci zastępują najgorsze.
+        local_search_mode - przeszukiwanie lokalne po mutacji (local_search.py): None, 'elite'
+                  (local_search_count najlepszych dzieci) lub 'all'; local_search_method: 'sa' lub 'tabu',
+                  local_search_steps - limit kroków na osobnika, local_search_time - limit czasu na generację [s].
+        mutation_rates - mutacje na poziomie kursów (mutation.py) wykonywane po mutate_swap_timeslots:
+                  słownik {'move' | 'swap' | 'teacher' | 'kempe': współczynnik}, gdzie współczynnik to oczekiwana
+                  liczba wywołań operatora na osobnika; mutation_rate dotyczy zamiany całych okien czasowych.
+        adaptive_mutation - adaptacyjny dobór mutacji (adaptive_mutation.AdaptiveMutation): udziały operatorów
+                  z mutation_rates (domyślnie wszystkie operatory po 1.0) przesuwane są w stronę operatorów
+                  dających największą poprawę na sekundę procesora, a mutation_rate i współczynniki operatorów
+                  rosną, gdy różnorodność populacji spada. Decyzje i statystyki każdej generacji zapisywane są
+                  w adaptation.pkl obok computing_times.pkl.
+        Czas rzeczywisty i czas procesora każdej fazy generacji (ewaluacja, selekcja, krzyżowanie, naprawianie,
+                  mutacja, ...) zapisywany jest w phase_times.pkl (profiling.PhaseTimer); profile_memory - dodatkowy
+                  pomiar szczytowego zużycia pamięci w fazach (tracemalloc, spowalnia obliczenia).
+        event_log - nazwa pliku strumienia zdarzeń JSONL w output_dir (events.EventLog; None - wyłączony):
+                  jedno zdarzenie na generację z najlepszą, średnią i najgorszą wartością funkcji celu,
+                  składowymi, czasami faz i różnorodnością populacji.
+        verbose - wypisywanie przebiegu faz każdej generacji, statystyk mutacji i pamięci podręcznej oraz wartości
+                  funkcji celu wszystkich osobników (False - tylko jeden wiersz podsumowania na generację;
+                  szczegóły trafiają do strumienia zdarzeń event_log).
+        selection - metoda selekcji: 'roulette', 'tournament' (tournament_size) lub 'rank';
+                  elite_count najlepszych osobników przechodzi do następnej generacji bez zmian.
+        Zwraca najlepszego osobnika w postaci zwartej (c, 3).
+    """
+    run_start = time.time()
+    if generations is None and max_time is None and stall_generations is None and target_value is None:
+        print("Brak warunku zakończenia: należy podać generations, max_time, stall_generations lub target_value.")
+        return
+
+    c, t, r, ts = instance.c, instance.t, instance.r, instance.ts
+    teacher_preferences = None
     if preferences_path:
-        with open("teacher_preferences2.json") as f:
+        with open(preferences_path) as f:
             teacher_preferences = json.load(f)
 
+    fitness_data = build_fitness_data(c, t, r, ts, instance.g_c_mapping, teacher_preferences)
+    w = np.asarray(w, dtype=float)
+
     print_numbers(c, t, r, ts, population_size)
 
     if population_size % 2:
         print("Rozmiar populacji powinien być parzysty.")
         return
 
-    # Tworzenie pomocniczego c_g_mapping
-    c_g_mapping = {c_idx: [] for c_idx in range(c)}
-    for g, courses_in_group in g_c_mapping.items():
-        for c_idx in courses_in_group:
-            c_g_mapping[c_idx].append(g)
-
     os.makedirs(output_dir, exist_ok=True)
 
+    timer = PhaseTimer(profile_memory)
+    adaptation = None
+    logs = {'phase_times': timer.log}
+    if adaptive_mutation:
+        adaptation = AdaptiveMutation(mutation_rate, mutation_rates or dict.fromkeys(MUTATION_OPERATORS, 1.0))
+        logs['adaptation'] = adaptation.log
+
+    checkpoint = None
+    if isinstance(loaded_population, dict):
+        checkpoint = loaded_population
+        loaded_population = checkpoint['population']
+
     if loaded_population is not None:
-        if loaded_population.shape != (c, t, r, ts, population_size):
+        if loaded_population.shape == (c, t, r, ts, population_size):
+            loaded_population = population_to_compact(loaded_population)
+        if loaded_population.shape != (population_size, c, 3):
             print("Rozmiary podanej populacji nie zgadzają się z podanymi parametrami.")
             return
-        population = loaded_population
+
+    # stała pula procesów ewaluacji na cały przebieg algorytmu
+    evaluator = PopulationEvaluator(fitness_data, n_workers, cache_size=fitness_cache_size, backend=kernel_backend)
+
+    if loaded_population is not None:
+        population = loaded_population.astype(COMPACT_DTYPE)
 
         # Load saved stats
         try:
-            with open(f'{output_dir}/fitness_history.pkl', 'rb') as f:
-                fitness_history = pickle.load(f)
-            with open(f'{output_dir}/computing_times.pkl', 'rb') as f:
-                computing_times = pickle.load(f)
-            best_individual = np.load(f'{output_dir}/best.npz')['best']
+            if checkpoint is not None:
+                fitness_history = list(checkpoint['fitness_history'])
+                computing_times = list(checkpoint['computing_times'])
+                start_generation = checkpoint['generation']
+                best_individual = checkpoint['best']
+                saved_logs = checkpoint.get('logs', {})
+                restore_random_state(checkpoint)
+            else:
+                with open(f'{output_dir}/fitness_history.pkl', 'rb') as f:
+                    fitness_history = pickle.load(f)
+                with open(f'{output_dir}/computing_times.pkl', 'rb') as f:
+                    computing_times = pickle.load(f)
+                start_generation = len(computing_times)
+                best_individual = load_best(f'{output_dir}/best.npz')
+                saved_logs = {}
+                for name in logs:
+                    if os.path.exists(f'{output_dir}/{name}.pkl'):
+                        with open(f'{output_dir}/{name}.pkl', 'rb') as f:
+                            saved_logs[name] = pickle.load(f)
+            timer.log[:0] = saved_logs.get('phase_times', [])
+            if adaptation is not None and 'adaptation' in saved_logs:
+                adaptation.restore(saved_logs['adaptation'])
+                logs['adaptation'] = adaptation.log
             # Recalculate best_ind_value if needed
-            best_ind_value = fitness(population[:, :, :, :, 0], c_t_mapping, c_r_mapping, g_c_mapping)
-            for j in range(population.shape[-1]):
-                value = fitness(population[:, :, :, :, j], c_t_mapping, c_r_mapping, g_c_mapping)
-                if value < best_ind_value:
-                    best_ind_value = value
-                    best_individual = population[:, :, :, :, j]
+            candidates = population if best_individual is None else np.concatenate([best_individual[np.newaxis], population])
+            loaded_values = evaluator.components(candidates) @ w
+            best_ind_value = float(loaded_values.min())
+            best_individual = candidates[int(loaded_values.argmin())].copy()
             print("Załadowano poprzednie dane statystyczne.")
         except Exception as e:
             print(f"Nie udało się załadować danych statystycznych: {e}")
             fitness_history = []
             computing_times = []
+            start_generation = 0
             best_individual = None
             best_ind_value = float('inf')
     else:
-        population = generate_population_satisfying_constraints(c, t, r, ts, population_size, c_t_mapping, c_r_mapping,
-                                                                g_c_mapping,
-                                                                c_g_mapping)
+        population = generate_population_satisfying_constraints(instance, population_size, construction)
+        print(f"nieprzypisane kursy w populacji początkowej: {int((population[:, :, 0] < 0).sum())}")
         fitness_history = []
         computing_times = []
+        start_generation = 0
         best_individual = None
         best_ind_value = float('inf')
 
-    # save original pop
-    np.savez_compressed(f'{output_dir}/original_population.npz', population=population)
+    # zapis plików odbywa się w tle, z atomową podmianą plików
+    writer = CheckpointWriter()
+    events = None
+    if event_log:
+        events = EventLog(f'{output_dir}/{event_log}', append=loaded_population is not None)
+        events.emit('start', population_size=population_size, generations=generations, mutation_rate=mutation_rate,
+                    selection=selection, elite_count=elite_count, weights=w, n_courses=c,
+                    start_generation=start_generation)
 
-    for i in range(generations):
-        print(f"--- generacja {i+1}/{generations} ---")
+    # save original pop
+    writer.write(f'{output_dir}/original_population.npz', partial(np.savez_compressed, population=population.copy()))
+
+    stall = 0
+    last_generation_time = 0.0
+    for i in itertools.count(start_generation):
+        reason = stop_reason(i, generations, time.time() - run_start, last_generation_time, max_time, stall,
+                             stall_generations, best_ind_value, target_value)
+        if reason is not None:
+            print(f"zakończenie: {reason}")
+            if events is not None:
+                events.emit('stop', generation=i, reason=reason)
+            break
+        progress = f"{i+1}/{generations}" if generations is not None else f"{i+1}"
+        if verbose:
+            print(f"--- generacja {progress} ---")
 
         # zapis do pliku
-        if saving_every and i != 0:
+        if saving_every and i != start_generation:
             if i % saving_every == 0:
-                np.savez_compressed(f'{output_dir}/population.npz', population=population)
-                np.savez_compressed(f'{output_dir}/best.npz', best=best_individual)
-                with open(f'{output_dir}/fitness_history.pkl', 'wb') as f:
-                    pickle.dump(fitness_history, f)
-                with open(f'{output_dir}/computing_times.pkl', 'wb') as f:
-                    pickle.dump(computing_times, f)
+                timer.phase("zapis")
+                save_outputs(writer, output_dir, population, best_individual, fitness_history, computing_times, t, r, ts, logs)
 
         time_start = time.time()
 
         # ewaluacja
-        print("ewaluacja")
-        fitness_values = [parallel_fitness(population[:, :, :, :, j], c_t_mapping, c_r_mapping, g_c_mapping, teacher_preferences=teacher_preferences) for j in range(population_size)]
-        print(fitness_values)
+        if verbose:
+            print("ewaluacja")
+        timer.phase("ewaluacja")
+        components = evaluator.components(population)
+        fitness_values = (components @ w).tolist()
+        diversity = population_diversity(population)
+        if verbose:
+            print(fitness_values)
         min_ind_value = min(fitness_values)
+        stall += 1
         if best_ind_value > min_ind_value:
             best_ind_value = min_ind_value
-            best_individual = population[:, :, :, :, fitness_values.index(min_ind_value)]
-        print(f"best overall: {best_ind_value}, best this gen: {min_ind_value}, average this gen: {sum(fitness_values) / population_size}")
+            best_individual = population[fitness_values.index(min_ind_value)].copy()
+            stall = 0
+        if verbose:
+            print(f"best overall: {best_ind_value}, best this gen: {min_ind_value}, "
+                  f"average this gen: {sum(fitness_values) / population_size}")
         fitness_history.append(fitness_values)
 
-        # selekcja
-        print("selekcja")   # odwracamy wartości fitness, bo chemy je minimalizować
-        fitness_scaled = [max(fitness_values) - f + 1e-2 for f in fitness_values]
-        total = sum(fitness_scaled)
-        fitness_normalized = [f / total for f in fitness_scaled]
-        cumulative_fitness = list(accumulate(fitness_normalized))
-        population = population[:, :, :, :, [bisect_left(cumulative_fitness, random.random()) for _ in range(population_size)]]
+        # migracja
+        if migrate is not None and migration_every and (i + 1) % migration_every == 0:
+            if verbose:
+                print("migracja")
+            timer.phase("migracja")
+            order = np.argsort(fitness_values)
+            immigrants = migrate(population[order[:migration_size]].copy(), i)
+            if immigrants is not None and len(immigrants):
+                immigrants = immigrants[:population_size]
+                worst = order[::-1][:len(immigrants)]
+                population[worst] = immigrants
+                # składowe imigrantów zastępują wiersze wypartych osobników, aby components i fitness_values
+                # (zdarzenie 'generation') opisywały tę samą populację
+                components[worst] = evaluator.components(immigrants)
+                immigrant_values = components[worst] @ w
+                fitness_values = list(fitness_values)
+                for j, value in zip(worst.tolist(), immigrant_values.tolist()):
+                    fitness_values[j] = value
+                    if value < best_ind_value:
+                        best_ind_value = value
+                        best_individual = population[j].copy()
+                        stall = 0
+
+        # selekcja (na indeksach; elita przechodzi do następnej generacji bez zmian)
+        if verbose:
+            print("selekcja")
+        timer.phase("selekcja")
+        elite = elite_indices(fitness_values, elite_count)
+        n_children = population_size - elite.size
+        parents_idx = select_parents(fitness_values, n_children + n_children % 2, selection, tournament_size)
 
         # krzyżowanie
-        print("krzyżowanie")
-        population = crossover_advanced(population, g_c_mapping, c_t_mapping, c_r_mapping, c_g_mapping)
+        if verbose:
+            print("krzyżowanie")
+        timer.phase("krzyżowanie")
+        children = crossover_advanced(population, instance, parents_idx)[:n_children]
 
         # naprawianie
-        print("naprawianie")
-        population = fix_unassigned_courses(population, c_t_mapping, c_r_mapping, c_g_mapping, g_c_mapping)
+        if verbose:
+            print("naprawianie")
+        timer.phase("naprawianie")
+        children = fix_unassigned_courses(children, instance)
 
         # mutacja
-        print("mutacja")
-        population = mutate_swap_timeslots(population, mutation_rate)
+        if verbose:
+            print("mutacja")
+        timer.phase("mutacja")
+        if adaptation is not None:
+            values_before = evaluator.components(children) @ w
+            timeslots_before = children[:, :, 2].copy()
+            cpu_start = time.process_time()
+            children = mutate_swap_timeslots(children, adaptation.mutation_rate, ts)
+            timeslot_cpu = time.process_time() - cpu_start
+            swapped = (children[:, :, 2] != timeslots_before).any(axis=1)
+            mutation_stats, moves = mutate_courses(children, instance, adaptation.rates())
+            values_after = evaluator.components(children) @ w
+            entry = adaptation.update(i, diversity, mutation_stats, moves, values_before, values_after,
+                                      (swapped.sum(), timeslot_cpu, swapped))
+            if verbose:
+                print("mutacje (wywołania, wykonane ruchy, czas procesora):", mutation_stats)
+                print(f"adaptacja mutacji: różnorodność {diversity:.3f}, mutation_rate {entry['mutation_rate']:.3f}, "
+                      f"współczynniki {({name: round(rate, 2) for name, rate in entry['rates'].items()})}")
+        else:
+            children = mutate_swap_timeslots(children, mutation_rate, ts)
+            if mutation_rates:
+                mutation_stats, _ = mutate_courses(children, instance, mutation_rates)
+                if verbose:
+                    print("mutacje (wywołania, wykonane ruchy, czas procesora):", mutation_stats)
+
+        # przeszukiwanie lokalne
+        if local_search_mode:
+            if verbose:
+                print("przeszukiwanie lokalne")
+            timer.phase("przeszukiwanie lokalne")
+            if local_search_mode == 'elite':
+                children_values = evaluator.components(children) @ w
+                improved = np.argsort(children_values)[:local_search_count]
+            else:
+                improved = range(n_children)
+            improvement = improve_population(children, improved, fitness_data, w, instance, local_search_method,
+                                             local_search_steps, local_search_time)
+            if verbose:
+                print(f"poprawa funkcji celu: {improvement}")
+
+        population = np.concatenate([population[elite], children])
 
         # zmierzenie czasu
         time_end = time.time() - time_start
-        print(f"### generacja {i+1}/{generations} ukończona w czasie {time_end:.2f} sekund\n")
+        phase_times = timer.end_generation()
+        if verbose:
+            print(f"czas faz (rzeczywisty/procesora): {format_phase_times(phase_times)}")
+        # jedyny wiersz generacji wypisywany niezależnie od verbose (szczegóły w strumieniu zdarzeń)
+        print(f"### generacja {progress} ukończona w czasie {time_end:.2f} sekund: best overall: {best_ind_value}, "
+              f"best this gen: {min(fitness_values)}, average this gen: {sum(fitness_values) / population_size}")
+        if verbose:
+            print()
+        if events is not None:
+            events.emit('generation', generation=i, **objective_summary(fitness_values, components, COMPONENTS),
+                        best_overall=best_ind_value, diversity=diversity, generation_time=time_end,
+                        phases=phase_times, mutation=adaptation.log[-1] if adaptation is not None else None)
         computing_times.append(time_end)
+        last_generation_time = time_end
+        if evaluator.cache is not None:
+            hits, misses = evaluator.cache.take_stats()
+            if verbose:
+                print(f"pamięć podręczna funkcji celu: trafienia {hits}, chybienia {misses}")
 
     # ewaluacja końcowa
     print("ewaluacja końcowa")
-    fitness_values = [parallel_fitness(population[:, :, :, :, j], c_t_mapping, c_r_mapping, g_c_mapping, teacher_preferences=teacher_preferences, verbose=True) for j in range(population_size)]
-    print(fitness_values)
+    components = evaluator.components(population)
+    fitness_values = (components @ w).tolist()
+    if verbose:
+        for j in range(population_size):
+            print(dict(zip(COMPONENTS, components[j].tolist())))
+        print(fitness_values)
+    if evaluator.cache is not None:
+        hits, misses = evaluator.cache.take_stats()
+        print(f"pamięć podręczna funkcji celu: trafienia {hits}, chybienia {misses}")
+    evaluator.close()
     min_ind_value = min(fitness_values)
     if best_ind_value > min_ind_value:
         best_ind_value = min_ind_value
-        best_individual = population[:, :, :, :, fitness_values.index(min_ind_value)]
+        best_individual = population[fitness_values.index(min_ind_value)].copy()
     print(f"best overall: {best_ind_value}, best this gen: {min_ind_value}, average this gen: {sum(fitness_values) / population_size}")
     fitness_history.append(fitness_values)
 
     # zapis końcowy
-    np.savez_compressed(f'{output_dir}/population.npz', population=population)
-    np.savez_compressed(f'{output_dir}/best.npz', best=best_individual)
-    with open(f'{output_dir}/fitness_history.pkl', 'wb') as f:
-        pickle.dump(fitness_history, f)
-    with open(f'{output_dir}/computing_times.pkl', 'wb') as f:
-        pickle.dump(computing_times, f)
+    timer.close()
+    save_outputs(writer, output_dir, population, best_individual, fitness_history, computing_times, t, r, ts, logs)
+    writer.close()
+    if events is not None:
+        events.emit('end', **objective_summary(fitness_values, components, COMPONENTS), best_overall=best_ind_value,
+                    diversity=population_diversity(population), elapsed=time.time() - run_start)
+        events.close()
 
-    print_constraints_values(best_individual, g_c_mapping, c_t_mapping, c_r_mapping)
+    print_constraints_values(compact_to_dense(best_individual, t, r, ts), instance)
 
     return best_individual
 
@@ -750,9 +1031,6 @@ if __name__ == "__main__":
     course_data = open_json("Final_load_data/merged_filtered_course_data.json")
     rooms_type_mapping_data = open_json("Final_load_data/final_class_type_to_rooms.json")
 
-    courses = sorted(course_data.keys())
-    teachers = sorted(set(v for course in course_data.values() for v in course.get("lecturers", [])))
-    rooms = sorted(set(v for l in rooms_type_mapping_data.values() for v in l))
     time_slots = [
         "Pon 7:30", "Pon 9:15", "Pon 11:15", "Pon 13:15", "Pon 15:15", "Pon 17:05", "Pon 18:45",
         "Wto 7:30", "Wto 9:15", "Wto 11:15", "Wto 13:15", "Wto 15:15", "Wto 17:05", "Wto 18:45",
@@ -761,22 +1039,20 @@ if __name__ == "__main__":
         "Pią 7:30", "Pią 9:15", "Pią 11:15", "Pią 13:15", "Pią 15:15", "Pią 17:05", "Pią 18:45",
     ]
 
-    course_teacher_mapping = create_c_t_mapping(course_data, courses, teachers)
-    courses_rooms_mapping = create_c_r_mapping(rooms_type_mapping_data, course_data, rooms, courses)
-    groups_courses_mapping = create_g_c_mapping(course_data, courses)
+    instance = create_instance(course_data, rooms_type_mapping_data, len(time_slots))
+
+    # katalog z punktem kontrolnym do wznowienia przebiegu (np. "output"); None - nowy przebieg
+    resume_dir = None
 
     solution = genetic_algorithm(
-        c=len(courses),
-        t=len(teachers),
-        r=len(rooms),
-        ts=len(time_slots),
+        instance=instance,
         population_size=20,
-        c_t_mapping=course_teacher_mapping,
-        c_r_mapping=courses_rooms_mapping,
-        g_c_mapping=groups_courses_mapping,
         generations=100,
         mutation_rate=0.15,
         saving_every=5,     # dla False nie zapisuje w ogóle
         #loaded_population=np.load("output/population.npz")["population"],
+        loaded_population=load_checkpoint(resume_dir) if resume_dir else None,
         preferences_path="teacher_preferences2.json",
+        n_workers=os.cpu_count(),
+        mutation_rates={'move': 2.0, 'swap': 1.0, 'teacher': 0.5, 'kempe': 0.5},
     )
@@ -1,35 +1,122 @@
 from ortools.sat.python import cp_model
-from optimization import open_json, create_c_r_mapping, create_c_t_mapping, create_g_c_mapping
+from optimization import open_json, create_instance, compact_to_dense, dense_to_compact, save_best, load_best, \
+    COMPACT_DTYPE
+from fitness_evaluation import build_fitness_data, population_fitness_components, preference_matrix, COMPONENTS
+from events import EventLog
 import numpy as np
+import argparse
 import json
 import os
+import random
+import time
 
 
-def extract_to_matrix(solver, c, t, r, ts, dv_teacher, dv_room, dv_timeslot):
-    sol = np.zeros((c, t, r, ts), dtype=bool)
+def extract_to_compact(solver, c, dv_teacher, dv_room, dv_timeslot):
+    ind = np.zeros((c, 3), dtype=COMPACT_DTYPE)
     for idx_c in range(c):
-        idx_t = solver.Value(dv_teacher[idx_c])
-        idx_r = solver.Value(dv_room[idx_c])
-        idx_ts = solver.Value(dv_timeslot[idx_c])
-        sol[idx_c, idx_t, idx_r, idx_ts] = True
-    return sol
-
-
-def optimization(c, t, r, ts, c_t_mapping, c_r_mapping, c_g_mapping, max_time=120.0, output_dir="output_solver"):
-
-    model = cp_model.CpModel()
-
-    # Struktura zmiennych decyzyjnych zapewnia, że każdy kurs jest przypisany dokładnie 1 raz
-
-    # Dla każdego kursu nauczyciel może być tylko z dostępnych (na podstawie c_t_mapping)
-    dv_teacher = [model.NewIntVarFromDomain(cp_model.Domain.FromValues(c_t_mapping[idx_c]), f'teacher_{c}') for idx_c in range(c)]
-
-    # Dla każdego kursu pokój może być tylko z dostępnych (na podstawie c_r_mapping)
-    dv_room = [model.NewIntVarFromDomain(cp_model.Domain.FromValues(c_r_mapping[idx_c]), f'room_{c}') for idx_c in range(c)]
+        ind[idx_c, 0] = solver.Value(dv_teacher[idx_c])
+        ind[idx_c, 1] = solver.Value(dv_room[idx_c])
+        ind[idx_c, 2] = solver.Value(dv_timeslot[idx_c])
+    return ind
 
-    dv_timeslot = [model.NewIntVar(0, ts - 1, f'timeslot_{idx_c}') for idx_c in range(c)]
 
-    # Dla każdych dwóch kursów nie może być w tym samym czasie ten sam nauczyciel, pokój lub grupa studencka
+def extract_to_matrix(solver, c, t, r, ts, dv_teacher, dv_room, dv_timeslot):
+    return compact_to_dense(extract_to_compact(solver, c, dv_teacher, dv_room, dv_timeslot), t, r, ts)
+
+
+def worker_name(solution_info):
+    """
+        Nazwa procesu roboczego CP-SAT z opisu rozwiązania (np. 'rnd_var_lns_default(d=0.50 ...)' -> 'rnd_var_lns_default').
+    """
+    return solution_info.split('(')[0].split(' ')[0] or 'unknown'
+
+
+class IncumbentLogger(cp_model.CpSolverSolutionCallback):
+    """
+        Zliczanie kolejnych rozwiązań solvera według procesu roboczego, który je znalazł (worker_wins),
+        oraz - gdy podano strumień events.EventLog - zdarzenie 'incumbent' dla każdego rozwiązania:
+        wartość funkcji celu (podzielona przez scale) i ograniczenie dolne, składowe funkcji celu algorytmu
+        genetycznego (fitness_evaluation.COMPONENTS), proces roboczy oraz część kursów zmienionych względem
+        poprzedniego rozwiązania.
+    """
+
+    def __init__(self, events, instance, dv_teacher, dv_room, dv_timeslot, teacher_preferences=None, scale=1):
+        cp_model.CpSolverSolutionCallback.__init__(self)
+        self.events = events
+        self.scale = scale
+        self.variables = list(zip(dv_teacher, dv_room, dv_timeslot))
+        self.fitness_data = build_fitness_data(instance.c, instance.t, instance.r, instance.ts, instance.g_c_mapping,
+                                               teacher_preferences)
+        self.previous = None
+        self.count = 0
+        self.worker_wins = {}
+
+    def on_solution_callback(self):
+        worker = worker_name(self.Response().solution_info)
+        self.worker_wins[worker] = self.worker_wins.get(worker, 0) + 1
+        self.count += 1
+        if self.events is None:
+            return
+        ind = np.array([[self.Value(v) for v in course] for course in self.variables], dtype=COMPACT_DTYPE)
+        components = population_fitness_components(ind[np.newaxis], self.fitness_data)[0]
+        changed = None if self.previous is None else float((ind != self.previous).any(axis=1).mean())
+        self.previous = ind
+        self.events.emit('incumbent', solution=self.count - 1, objective=self.ObjectiveValue() / self.scale,
+                         bound=self.BestObjectiveBound() / self.scale, wall_time=self.WallTime(), worker=worker,
+                         components=dict(zip(COMPONENTS, components.tolist())), changed_fraction=changed)
+
+
+FORMULATIONS = ('linear', 'pairwise')
+OBJECTIVE_SCALE = 10
+
+
+def course_literals(model, instance, dv_teacher, dv_timeslot):
+    """
+        Wspólne literały kanałowania zmiennych kursów, tworzone raz dla całego modelu:
+        is_teacher[idx_c] - słownik {prowadzący: literał dv_teacher == prowadzący} (dokładnie jeden prawdziwy;
+        dla kursu z jednym dopuszczalnym prowadzącym - stała prawda),
+        is_slot[idx_c] - lista ts literałów dv_timeslot == okno (AddMapDomain).
+    """
+    is_teacher = []
+    is_slot = []
+    for idx_c in range(instance.c):
+        teachers = instance.course_teachers[idx_c].tolist()
+        if len(teachers) == 1:
+            literals = {teachers[0]: model.NewConstant(1)}
+        else:
+            literals = {}
+            for idx_t in teachers:
+                b = model.NewBoolVar(f'c{idx_c}_is_t{idx_t}')
+                model.Add(dv_teacher[idx_c] == idx_t).OnlyEnforceIf(b)
+                model.Add(dv_teacher[idx_c] != idx_t).OnlyEnforceIf(b.Not())
+                literals[idx_t] = b
+            model.AddExactlyOne(literals.values())
+        is_teacher.append(literals)
+        slots = [model.NewBoolVar(f'c{idx_c}_is_slot{idx_ts}') for idx_ts in range(instance.ts)]
+        model.AddMapDomain(dv_timeslot[idx_c], slots)
+        is_slot.append(slots)
+    return is_teacher, is_slot
+
+
+def conjunction(model, a, b, name):
+    """
+        Literał równoważny koniunkcji a AND b.
+    """
+    both = model.NewBoolVar(name)
+    model.AddBoolOr([a.Not(), b.Not(), both])
+    model.AddImplication(both, a)
+    model.AddImplication(both, b)
+    return both
+
+
+def add_pairwise_conflicts(model, instance, dv_teacher, dv_room, dv_timeslot):
+    """
+        Ograniczenia konfliktów dla każdej pary kursów (O(c^2) zmiennych reifikowanych): para kursów
+        w tym samym oknie czasowym musi mieć różnych prowadzących i różne pokoje, a kursy wspólnej grupy
+        studenckiej muszą mieć różne okna czasowe.
+    """
+    c = instance.c
+    share_group = instance.courses_share_group()
     for idx_c1 in range(c):
         for idx_c2 in range(idx_c1 + 1, c):
             diff_teacher = model.NewBoolVar(f'diff_teacher_{idx_c1}_{idx_c2}')
@@ -43,136 +130,427 @@ def optimization(c, t, r, ts, c_t_mapping, c_r_mapping, c_g_mapping, max_time=12
             model.Add(dv_timeslot[idx_c1] == dv_timeslot[idx_c2]).OnlyEnforceIf(diff_timeslot.Not())
             model.AddBoolOr([diff_teacher, diff_timeslot])
             model.AddBoolOr([diff_room, diff_timeslot])
-            if c_g_mapping[idx_c1] == c_g_mapping[idx_c2]:
+            if share_group[idx_c1, idx_c2]:
                 model.Add(dv_timeslot[idx_c1] != dv_timeslot[idx_c2])
+
+
+def add_linear_conflicts(model, instance, dv_teacher, dv_room, dv_timeslot, is_slot):
+    """
+        Ograniczenia konfliktów o rozmiarze liniowym względem liczby kursów: dla każdego kursu klucze
+        prowadzący * ts + okno i pokój * ts + okno, z AddAllDifferent na kluczach wszystkich kursów
+        (ten sam prowadzący lub pokój w tym samym oknie daje równe klucze) oraz AddAtMostOne
+        na wspólnych literałach okien (course_literals) kursów każdej grupy studenckiej w każdym oknie.
+    """
+    c, ts = instance.c, instance.ts
+    teacher_keys = []
+    room_keys = []
+    for idx_c in range(c):
+        for keys, dv, allowed, name in ((teacher_keys, dv_teacher, instance.course_teachers, 'teacher'),
+                                        (room_keys, dv_room, instance.course_rooms, 'room')):
+            values = (allowed[idx_c][:, np.newaxis] * ts + np.arange(ts)).ravel().tolist()
+            key = model.NewIntVarFromDomain(cp_model.Domain.FromValues(values), f'{name}_slot_{idx_c}')
+            model.Add(key == dv[idx_c] * ts + dv_timeslot[idx_c])
+            keys.append(key)
+    model.AddAllDifferent(teacher_keys)
+    model.AddAllDifferent(room_keys)
+    for g_idx in range(instance.n_groups):
+        courses = instance.group_courses(g_idx).tolist()
+        if len(courses) > 1:
+            for idx_ts in range(ts):
+                model.AddAtMostOne([is_slot[idx_c][idx_ts] for idx_c in courses])
+
+
+def model_size(model):
+    """
+        Rozmiar modelu CP-SAT: liczba zmiennych i ograniczeń.
+    """
+    proto = model.Proto()
+    return {'variables': len(proto.variables), 'constraints': len(proto.constraints)}
+
+
+def add_day_gaps(model, slots, name):
+    """
+        Literały 'okienek' jednego dnia dla listy s wyrażeń zajętości okien (0/1): okno k jest okienkiem,
+        gdy jest wolne i leży między pierwszymi a ostatnimi zajęciami dnia (started[k-1] i ended[k+1],
+        gdzie started i ended to alternatywy zajętości okien od początku i do końca dnia).
+        Zapis dwustronny (ograniczenia dolne i górne), więc literały są dokładne w każdym rozwiązaniu
+        dopuszczalnym, a nie tylko w optymalnym - wartość funkcji celu przerwanego przebiegu jest poprawna.
+        Zwraca listę s - 2 literałów.
+    """
+    s = len(slots)
+    if s < 3:
+        return []
+    started = [slots[0]]
+    for k in range(1, s - 2):
+        b = model.NewBoolVar(f'{name}_started_{k}')
+        model.Add(b >= started[-1])
+        model.Add(b >= slots[k])
+        model.Add(b <= started[-1] + slots[k])
+        started.append(b)
+    ended = {s - 1: slots[s - 1]}
+    for k in range(s - 2, 1, -1):
+        b = model.NewBoolVar(f'{name}_ended_{k}')
+        model.Add(b >= ended[k + 1])
+        model.Add(b >= slots[k])
+        model.Add(b <= ended[k + 1] + slots[k])
+        ended[k] = b
+    gaps = []
+    for k in range(1, s - 1):
+        gap = model.NewBoolVar(f'{name}_{k}')
+        model.Add(gap >= started[k - 1] + ended[k + 1] - slots[k] - 1)
+        model.Add(gap <= 1 - slots[k])
+        model.Add(gap <= started[k - 1])
+        model.Add(gap <= ended[k + 1])
+        gaps.append(gap)
+    return gaps
+
+
+def objective_scale(group_gaps, teacher_preferences):
+    """
+        Mnożnik całkowitoliczbowej funkcji celu: 1 dla samych okienek prowadzących, OBJECTIVE_SCALE
+        dla funkcji ważonej (wagi i kary za preferencje są wielokrotnościami 0.1).
+    """
+    return OBJECTIVE_SCALE if group_gaps or teacher_preferences else 1
+
+
+def build_model(instance, formulation='linear', group_gaps=False, teacher_preferences=None, w=(3.0, 2.0, 1.0)):
+    """
+        Budowa modelu CP-SAT planu zajęć minimalizującego liczbę 'okienek' prowadzących.
+        formulation - sposób zapisu konfliktów prowadzących, pokoi i grup: 'linear' (add_linear_conflicts,
+        rozmiar liniowy) lub 'pairwise' (add_pairwise_conflicts, rozmiar kwadratowy względem liczby kursów).
+        group_gaps, teacher_preferences - dodanie do funkcji celu okienek grup studenckich i kar za preferencje
+        prowadzących ({ "t": { "ts": ocena } }); funkcja celu jest wtedy sumą ważoną wagami w (okienka
+        prowadzących, okienka grup, preferencje) jak w fitness algorytmu genetycznego, przemnożoną
+        przez objective_scale.
+        Zwraca model oraz listy zmiennych decyzyjnych (dv_teacher, dv_room, dv_timeslot) kursów.
+    """
+    if formulation not in FORMULATIONS:
+        raise ValueError(f"Nieznane sformułowanie modelu: {formulation}")
+
+    c, t, ts = instance.c, instance.t, instance.ts
+    model = cp_model.CpModel()
+
+    # Struktura zmiennych decyzyjnych zapewnia, że każdy kurs jest przypisany dokładnie 1 raz
+
+    # Dla każdego kursu nauczyciel może być tylko z dostępnych (instance.course_teachers)
+    dv_teacher = [model.NewIntVarFromDomain(cp_model.Domain.FromValues(instance.course_teachers[idx_c].tolist()),
+                                            f'teacher_{idx_c}') for idx_c in range(c)]
+
+    # Dla każdego kursu pokój może być tylko z dostępnych (instance.course_rooms)
+    dv_room = [model.NewIntVarFromDomain(cp_model.Domain.FromValues(instance.course_rooms[idx_c].tolist()),
+                                         f'room_{idx_c}') for idx_c in range(c)]
+
+    dv_timeslot = [model.NewIntVar(0, ts - 1, f'timeslot_{idx_c}') for idx_c in range(c)]
+
+    # Literały kurs-prowadzący i kurs-okno wspólne dla konfliktów, zajęć prowadzących i funkcji celu
+    is_teacher, is_slot = course_literals(model, instance, dv_teacher, dv_timeslot)
+
+    # Dla każdych dwóch kursów nie może być w tym samym czasie ten sam nauczyciel, pokój lub grupa studencka
+    if formulation == 'linear':
+        add_linear_conflicts(model, instance, dv_teacher, dv_room, dv_timeslot, is_slot)
+    else:
+        add_pairwise_conflicts(model, instance, dv_teacher, dv_room, dv_timeslot)
     print("Ograniczenie 1 nauczyciel i 1 pokój na 1 okno czasowe wprowadzone.")
 
-    d = 5
-    s = ts // d
+    # has_class prowadzącego w oknie to suma literałów "kurs prowadzony przez niego w tym oknie"
+    # (co najwyżej jeden kurs na prowadzącego i okno, więc zmienna logiczna równa sumie)
+    d = instance.days
+    s = instance.s
     has_class = {}
     for idx_t in range(t):
+        courses = instance.teacher_courses[idx_t].tolist()
         for idx_d in range(d):
             for idx_s in range(s):
                 idx_ts = idx_d * s + idx_s
-                b = model.NewBoolVar(f'has_class_{idx_t}_{idx_d}_{idx_s}')
+                if not courses:
+                    has_class[(idx_t, idx_d, idx_s)] = model.NewConstant(0)
+                    continue
                 relevant_courses = []
-                for idx_c in range(c):
-                    if idx_t in c_t_mapping[idx_c]:
-                        b1 = model.NewBoolVar(f'c{idx_c}_is_t{idx_t}')
-                        b2 = model.NewBoolVar(f'c{idx_c}_is_slot{idx_ts}')
-                        course_here = model.NewBoolVar(f'course_{idx_c}_{idx_t}_{idx_ts}')
-                        model.Add(dv_teacher[idx_c] == idx_t).OnlyEnforceIf(b1)
-                        model.Add(dv_teacher[idx_c] != idx_t).OnlyEnforceIf(b1.Not())
-                        model.Add(dv_timeslot[idx_c] == idx_ts).OnlyEnforceIf(b2)
-                        model.Add(dv_timeslot[idx_c] != idx_ts).OnlyEnforceIf(b2.Not())
-                        model.AddBoolAnd([b1, b2]).OnlyEnforceIf(course_here)
-                        model.AddBoolOr([b1.Not(), b2.Not()]).OnlyEnforceIf(course_here.Not())
-                        relevant_courses.append(course_here)
-                if relevant_courses:
-                    model.AddMaxEquality(b, relevant_courses)
+                for idx_c in courses:
+                    if len(is_teacher[idx_c]) == 1:
+                        relevant_courses.append(is_slot[idx_c][idx_ts])
+                    else:
+                        relevant_courses.append(conjunction(model, is_teacher[idx_c][idx_t], is_slot[idx_c][idx_ts],
+                                                            f'course_{idx_c}_{idx_t}_{idx_ts}'))
+                b = model.NewBoolVar(f'has_class_{idx_t}_{idx_d}_{idx_s}')
+                model.Add(b == sum(relevant_courses))
                 has_class[(idx_t, idx_d, idx_s)] = b
     print("Lista zajęcia prowadzącego w oknach czasowych utworzona.")
 
+    # 'okienka' prowadzących (oraz opcjonalnie grup) i kary za preferencje, jak w funkcji celu algorytmu genetycznego
     gaps = []
-    elo1 = {}
-    elo2 = {}
     for idx_t in range(t):
+        if instance.teacher_courses[idx_t].size < 2:
+            continue
         for idx_d in range(d):
-            has_classes = [has_class[(idx_t, idx_d, idx_s)] for idx_s in range(s)]
-
-            has_any = model.NewBoolVar(f'has_any_{idx_t}_{idx_d}')
-            model.AddBoolOr(has_classes).OnlyEnforceIf(has_any)
-            model.AddBoolAnd([hc.Not() for hc in has_classes]).OnlyEnforceIf(has_any.Not())
-
-            earliest = model.NewIntVar(0, s, f'earliest_{idx_t}_{idx_d}')
-            latest = model.NewIntVar(0, s, f'latest_{idx_t}_{idx_d}')
-
-            earliest_vals = []
-            for idx_s in range(s):
-                val = model.NewIntVar(0, s, f'earliest_val_{idx_t}_{idx_d}_{idx_s}')
-                model.Add(val == idx_s).OnlyEnforceIf(has_classes[idx_s])
-                model.Add(val == s).OnlyEnforceIf(has_classes[idx_s].Not())
-                earliest_vals.append(val)
-            model.AddMinEquality(earliest, earliest_vals)
-
-            elo1[(idx_t, idx_d)] = earliest
-
-            latest_vals = []
-            for idx_s in range(s):
-                val = model.NewIntVar(0, s, f'latest_val_{idx_t}_{idx_d}_{idx_s}')
-                model.Add(val == idx_s).OnlyEnforceIf(has_classes[idx_s])
-                model.Add(val == 0).OnlyEnforceIf(has_classes[idx_s].Not())
-                latest_vals.append(val)
-            model.AddMaxEquality(latest, latest_vals)
-
-            elo2[(idx_t, idx_d)] = latest
-
-            total_gap = model.NewIntVar(0, s, f'total_gap_{idx_t}_{idx_d}')
-            model.Add(total_gap == (latest - earliest + 1) - sum([has_class[(idx_t, idx_d, idx_s)] for idx_s in range(s)])).OnlyEnforceIf(has_any)
-            model.Add(total_gap == 0).OnlyEnforceIf(has_any.Not())
-            gaps.append(total_gap)
-
+            gaps += add_day_gaps(model, [has_class[(idx_t, idx_d, idx_s)] for idx_s in range(s)], f'gap_t{idx_t}_d{idx_d}')
     print("Funkcja celu liczenia okienek wprowadzona.")
 
-    model.Minimize(sum(gaps))
+    if not group_gaps and not teacher_preferences:
+        model.Minimize(sum(gaps))
+        return model, dv_teacher, dv_room, dv_timeslot
+
+    scale = objective_scale(group_gaps, teacher_preferences)
+    objective = round(scale * w[0]) * sum(gaps)
+    if group_gaps:
+        group_gap_terms = []
+        for g_idx in range(instance.n_groups):
+            courses = instance.group_courses(g_idx).tolist()
+            if len(courses) < 2:
+                continue
+            for idx_d in range(d):
+                occupied = [sum(is_slot[idx_c][idx_d * s + idx_s] for idx_c in courses) for idx_s in range(s)]
+                group_gap_terms += add_day_gaps(model, occupied, f'gap_g{g_idx}_d{idx_d}')
+        objective += round(scale * w[1]) * sum(group_gap_terms)
+        print("Funkcja celu liczenia okienek grup wprowadzona.")
+    if teacher_preferences:
+        penalties = preference_matrix(t, ts, teacher_preferences)
+        for (idx_t, idx_d, idx_s), b in has_class.items():
+            coefficient = round(scale * w[2] * penalties[idx_t, idx_d * s + idx_s])
+            if coefficient:
+                objective += coefficient * b
+        print("Kary za preferencje prowadzących wprowadzone.")
+    model.Minimize(objective)
+
+    return model, dv_teacher, dv_room, dv_timeslot
+
+
+def compare_formulations(instance):
+    """
+        Rozmiar modelu i czas budowy dla każdego sformułowania (FORMULATIONS).
+    """
+    report = {}
+    for formulation in FORMULATIONS:
+        start = time.perf_counter()
+        model = build_model(instance, formulation)[0]
+        report[formulation] = {'build_time_seconds': time.perf_counter() - start, **model_size(model)}
+        print(f"{formulation}: {report[formulation]}")
+    return report
+
+
+HINT_VARIABLES = ('teacher', 'room', 'timeslot')
+
+
+def add_solution_hints(model, instance, solution, dv_teacher, dv_room, dv_timeslot, fix_variables=(),
+                       fix_fraction=1.0, seed=0):
+    """
+        Podpowiedź startowa solvera (AddHint) z istniejącego rozwiązania w postaci zwartej (c, 3) lub gęstej
+        (c, t, r, ts), np. best.npz algorytmu genetycznego lub poprzedniego przebiegu solvera (load_best).
+        Kursy nieprzypisane i przypisania spoza dziedzin zmiennych (np. po zmianie danych) są pomijane;
+        solver uzupełnia pozostałe zmienne sam.
+        fix_variables - podzbiór HINT_VARIABLES, których wartości z rozwiązania są ustalane ograniczeniem
+        (zamiast podpowiedzi) dla części fix_fraction podpowiadanych kursów wylosowanych z ziarnem seed.
+        Zwraca (liczba kursów z podpowiedzią, liczba kursów z ustalonymi zmiennymi).
+    """
+    solution = np.asarray(solution)
+    if solution.ndim == 4:
+        solution = dense_to_compact(solution)
+    if solution.shape != (instance.c, 3):
+        raise ValueError(f"Rozwiązanie o rozmiarze {solution.shape} nie pasuje do instancji ({instance.c} kursów).")
+    for name in fix_variables:
+        if name not in HINT_VARIABLES:
+            raise ValueError(f"Nieznana zmienna do ustalenia: {name}")
+
+    hinted = []
+    for idx_c in range(instance.c):
+        t_idx, r_idx, ts_idx = solution[idx_c].tolist()
+        if (t_idx in instance.course_teachers[idx_c] and r_idx in instance.course_rooms[idx_c]
+                and 0 <= ts_idx < instance.ts):
+            hinted.append(idx_c)
+            model.AddHint(dv_teacher[idx_c], t_idx)
+            model.AddHint(dv_room[idx_c], r_idx)
+            model.AddHint(dv_timeslot[idx_c], ts_idx)
+
+    fixed = []
+    if fix_variables and hinted:
+        fixed = random.Random(seed).sample(hinted, round(fix_fraction * len(hinted)))
+        variables = {'teacher': dv_teacher, 'room': dv_room, 'timeslot': dv_timeslot}
+        for idx_c in fixed:
+            for name in fix_variables:
+                model.Add(variables[name][idx_c] == int(solution[idx_c, HINT_VARIABLES.index(name)]))
+    return len(hinted), len(fixed)
+
+
+def configure_solver(solver, max_time=120.0, num_workers=None, random_seed=42, lns_only=False, presolve=True,
+                     params_file=None, log_search_progress=False):
+    """
+        Ustawienie parametrów CpSolver: num_workers - liczba procesów roboczych portfela (None - wszystkie
+        rdzenie), random_seed, lns_only - tylko procesy robocze LNS (bez pełnego przeszukiwania),
+        presolve - wstępne upraszczanie modelu, params_file - plik parametrów SatParameters w formacie
+        tekstowym protobuf (np. 'num_workers: 16 linearization_level: 2'), którego wartości nadpisują
+        pozostałe argumenty.
+    """
+    solver.parameters.max_time_in_seconds = max_time
+    if num_workers is not None:
+        solver.parameters.num_workers = num_workers
+    if random_seed is not None:
+        solver.parameters.random_seed = random_seed
+    solver.parameters.use_lns_only = lns_only
+    solver.parameters.cp_model_presolve = presolve
+    solver.parameters.log_search_progress = log_search_progress
+    if params_file:
+        with open(params_file) as f:
+            if not solver.parameters.merge_text_format(f.read()):
+                raise ValueError(f"Niepoprawny plik parametrów solvera: {params_file}")
+
+
+def solver_statistics(solver, status, callback=None):
+    """
+        Statystyki przebiegu solvera do results.json.
+    """
+    stats = {
+        "status": solver.StatusName(status),
+        "wall_time": solver.WallTime(),
+        "user_time": solver.UserTime(),
+        "deterministic_time": solver.response_proto.deterministic_time,
+        "num_branches": solver.NumBranches(),
+        "num_conflicts": solver.NumConflicts(),
+        "best_objective_bound": solver.BestObjectiveBound(),
+        "solution_info": solver.SolutionInfo(),
+        "response_stats": solver.ResponseStats(),
+        "parameters": str(solver.parameters).replace('\n', ' '),
+    }
+    if callback is not None:
+        stats["num_solutions"] = callback.count
+        stats["worker_wins"] = callback.worker_wins
+    return stats
+
+
+def optimization(instance, max_time=120.0, output_dir="output_solver", event_log="events.jsonl", verbose=True,
+                 formulation='linear', group_gaps=False, preferences_path=None, w=(3.0, 2.0, 1.0), num_workers=None,
+                 random_seed=42, lns_only=False, presolve=True, params_file=None, log_search_progress=False,
+                 hint_path=None, fix_variables=(), fix_fraction=1.0):
+    """
+        Rozwiązanie modelu CP-SAT (build_model, formulation: 'linear' lub 'pairwise') i zapis wyniku w output_dir.
+        group_gaps, preferences_path - funkcja celu z okienkami grup i karami za preferencje prowadzących
+        (plik JSON jak w genetic_algorithm), ważona wagami w; wartość funkcji celu podawana jest w jednostkach
+        fitness algorytmu genetycznego.
+        event_log - nazwa pliku strumienia zdarzeń JSONL w output_dir (IncumbentLogger; None - wyłączony),
+        verbose - wypisywanie przypisań wszystkich kursów znalezionego rozwiązania.
+        num_workers, random_seed, lns_only, presolve, params_file, log_search_progress - parametry solvera
+        (configure_solver). Statystyki przebiegu (solver_statistics) zapisywane są w results.json.
+        hint_path - plik best.npz (algorytmu genetycznego lub poprzedniego przebiegu solvera), którego
+        rozwiązanie jest podpowiedzią startową; fix_variables, fix_fraction - ustalenie części zmiennych
+        (add_solution_hints).
+    """
+
+    c, t, r, ts = instance.c, instance.t, instance.r, instance.ts
+    teacher_preferences = None
+    if preferences_path:
+        teacher_preferences = open_json(preferences_path)
+    scale = objective_scale(group_gaps, teacher_preferences)
+
+    build_start = time.perf_counter()
+    model, dv_teacher, dv_room, dv_timeslot = build_model(instance, formulation, group_gaps, teacher_preferences, w)
+    build_time = time.perf_counter() - build_start
+    size = model_size(model)
+    print(f"Model ({formulation}): zmienne {size['variables']}, ograniczenia {size['constraints']}, "
+          f"czas budowy {build_time:.2f} s")
+
+    hint = None
+    hints = None
+    if hint_path:
+        hint = load_best(hint_path)
+        n_hinted, n_fixed = add_solution_hints(model, instance, hint, dv_teacher, dv_room, dv_timeslot,
+                                               fix_variables, fix_fraction, random_seed or 0)
+        hints = {"path": hint_path, "hinted_courses": n_hinted, "fixed_courses": n_fixed,
+                 "fixed_variables": list(fix_variables)}
+        print(f"Podpowiedź startowa z {hint_path}: kursy {n_hinted}/{c}, ustalone kursy {n_fixed}")
 
     solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = max_time
+    configure_solver(solver, max_time, num_workers, random_seed, lns_only, presolve, params_file, log_search_progress)
 
-    # Ustalone ziarno i liczba wątków dla celów testowych
-    solver.parameters.random_seed = 42
-    solver.parameters.num_search_workers = 1
+    os.makedirs(output_dir, exist_ok=True)
+    events = None
+    if event_log:
+        events = EventLog(f'{output_dir}/{event_log}')
+        events.emit('start', n_courses=c, max_time=max_time, formulation=formulation,
+                    parameters=str(solver.parameters).replace('\n', ' '), hints=hints)
+    callback = IncumbentLogger(events, instance, dv_teacher, dv_room, dv_timeslot, teacher_preferences, scale)
+    # część zmienionych kursów pierwszego rozwiązania liczona względem podpowiedzi
+    callback.previous = hint
 
-    status = solver.Solve(model)
+    status = solver.Solve(model, callback)
+
+    if events is not None:
+        events.emit('end', status=solver.StatusName(status), objective=solver.ObjectiveValue() / scale,
+                    bound=solver.BestObjectiveBound() / scale, wall_time=solver.WallTime())
+        events.close()
 
     if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
         if status == cp_model.OPTIMAL:
             print("Znaleziono rozwiązanie OPTYMALNE.")
         else:
             print("Znaleziono rozwiązanie DOPUSZCZALNE.")
-        print(f'Wartość funkcji celu: {solver.ObjectiveValue()}')
+        print(f'Wartość funkcji celu: {solver.ObjectiveValue() / scale}')
         print(f'Czas pracy solvera: {solver.WallTime()}')
-        for idx_c in range(c):
-            print(
-                f'Kurs {idx_c}: nauczyciel {solver.Value(dv_teacher[idx_c])},',
-                f'pokój {solver.Value(dv_room[idx_c])},',
-                f'slot {solver.Value(dv_timeslot[idx_c])}',
-            )
+        if verbose:
+            for idx_c in range(c):
+                print(
+                    f'Kurs {idx_c}: nauczyciel {solver.Value(dv_teacher[idx_c])},',
+                    f'pokój {solver.Value(dv_room[idx_c])},',
+                    f'slot {solver.Value(dv_timeslot[idx_c])}',
+                )
 
         # print("Values of has_class after solve:")
         # for key in has_class:
         #     print(key, solver.Value(has_class[key]))
 
-        best = extract_to_matrix(solver, c, t, r, ts, dv_teacher, dv_room, dv_timeslot)
+        best = extract_to_compact(solver, c, dv_teacher, dv_room, dv_timeslot)
         # zapis do pliku
-        os.makedirs(output_dir, exist_ok=True)
-        np.savez_compressed(f'{output_dir}/best.npz', best=best)
-        result = {
-            "objective_value": solver.ObjectiveValue(),
-            "computing_time_seconds": solver.WallTime(),
-        }
-        with open(f"{output_dir}/results.json", "w") as f:
-            json.dump(result, f, indent=4)
-
+        save_best(f'{output_dir}/best.npz', best, t, r, ts)
     else:
         print("Nie znaleziono rozwiązania.")
 
+    found = status == cp_model.OPTIMAL or status == cp_model.FEASIBLE
+    result = {
+        "objective_value": solver.ObjectiveValue() / scale if found else None,
+        "objective": {"group_gaps": group_gaps, "preferences": preferences_path, "weights": list(w)},
+        "computing_time_seconds": solver.WallTime(),
+        "formulation": formulation,
+        "model_build_time_seconds": build_time,
+        "model_variables": size['variables'],
+        "model_constraints": size['constraints'],
+        "solver": solver_statistics(solver, status, callback),
+        "hints": hints,
+    }
+    with open(f"{output_dir}/results.json", "w") as f:
+        json.dump(result, f, indent=4)
+    print(f"Gałęzie: {solver.NumBranches()}, konflikty: {solver.NumConflicts()}, "
+          f"rozwiązania według procesów roboczych: {callback.worker_wins}")
+
     return 0
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Układanie planu zajęć solverem CP-SAT.")
+    parser.add_argument('--max-time', type=float, default=3600.0, help="limit czasu solvera [s]")
+    parser.add_argument('--workers', type=int, default=None, help="liczba procesów roboczych (domyślnie wszystkie rdzenie)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--lns-only', action='store_true', help="tylko procesy robocze LNS")
+    parser.add_argument('--no-presolve', action='store_true', help="wyłączenie wstępnego upraszczania modelu")
+    parser.add_argument('--params-file', default=None, help="plik SatParameters w formacie tekstowym protobuf")
+    parser.add_argument('--log-search-progress', action='store_true')
+    parser.add_argument('--formulation', choices=FORMULATIONS, default='linear')
+    parser.add_argument('--group-gaps', action='store_true', help="okienka grup w funkcji celu")
+    parser.add_argument('--preferences', default=None, help="plik preferencji prowadzących do funkcji celu")
+    parser.add_argument('--fields', nargs='+', default=None, help="ograniczenie kursów do podanych kierunków, np. ISA IST INS")
+    parser.add_argument('--hint', default=None,
+                        help="best.npz algorytmu genetycznego lub poprzedniego przebiegu jako podpowiedź startowa")
+    parser.add_argument('--fix', nargs='+', choices=HINT_VARIABLES, default=(),
+                        help="zmienne ustalane na wartości z podpowiedzi")
+    parser.add_argument('--fix-fraction', type=float, default=1.0, help="część kursów z ustalonymi zmiennymi")
+    parser.add_argument('--output-dir', default='output_solver')
+    parser.add_argument('--quiet', action='store_true', help="bez wypisywania przypisań wszystkich kursów")
+    args = parser.parse_args()
 
     course_data = open_json("Final_load_data/merged_filtered_course_data.json")
     rooms_type_mapping_data = open_json("Final_load_data/final_class_type_to_rooms.json")
 
-    # Filtrowanie kursów w celu ograniczenia liczby kursów <-----------
-    #allowed_fields = ["ISA", "IST", "INS"]
-    #course_data = {key: val for key, val in course_data.items() if val["field"] in allowed_fields}
-    course_data = {key: val for key, val in course_data.items()}
+    # Filtrowanie kursów w celu ograniczenia liczby kursów
+    if args.fields:
+        course_data = {key: val for key, val in course_data.items() if val["field"] in args.fields}
 
-    courses = sorted(course_data.keys())
-    teachers = sorted(set(v for course in course_data.values() for v in course.get("lecturers", [])))
-    rooms = sorted(set(v for l in rooms_type_mapping_data.values() for v in l))
     time_slots = [
         "Pon 7:30", "Pon 9:15", "Pon 11:15", "Pon 13:15", "Pon 15:15", "Pon 17:05", "Pon 18:45",
         "Wto 7:30", "Wto 9:15", "Wto 11:15", "Wto 13:15", "Wto 15:15", "Wto 17:05", "Wto 18:45",
@@ -181,26 +559,26 @@ if __name__ == "__main__":
         "Pią 7:30", "Pią 9:15", "Pią 11:15", "Pią 13:15", "Pią 15:15", "Pią 17:05", "Pią 18:45",
     ]
 
-    print(f"ilość kursów: {len(courses)}")
-    print()
-
-    course_teacher_mapping = create_c_t_mapping(course_data, courses, teachers)
-    courses_rooms_mapping = create_c_r_mapping(rooms_type_mapping_data, course_data, rooms, courses)
-    groups_courses_mapping = create_g_c_mapping(course_data, courses)
+    instance = create_instance(course_data, rooms_type_mapping_data, len(time_slots))
 
-    # Tworzenie pomocniczego courses_groups_mapping
-    courses_groups_mapping = {c_idx: [] for c_idx in range(len(courses))}
-    for g, courses_in_group in groups_courses_mapping.items():
-        for c_idx in courses_in_group:
-            courses_groups_mapping[c_idx].append(g)
+    print(f"ilość kursów: {instance.c}")
+    print()
 
     solution = optimization(
-        c=len(courses),
-        t=len(teachers),
-        r=len(rooms),
-        ts=len(time_slots),
-        c_t_mapping=course_teacher_mapping,
-        c_r_mapping=courses_rooms_mapping,
-        c_g_mapping=courses_groups_mapping,
-        max_time=3600.0,
+        instance=instance,
+        max_time=args.max_time,
+        output_dir=args.output_dir,
+        verbose=not args.quiet,
+        formulation=args.formulation,
+        group_gaps=args.group_gaps,
+        preferences_path=args.preferences,
+        num_workers=args.workers,
+        random_seed=args.seed,
+        lns_only=args.lns_only,
+        presolve=not args.no_presolve,
+        params_file=args.params_file,
+        log_search_progress=args.log_search_progress,
+        hint_path=args.hint,
+        fix_variables=args.fix,
+        fix_fraction=args.fix_fraction,
     )
@@ -0,0 +1,75 @@
+import time
+import tracemalloc
+
+
+class PhaseTimer:
+    """
+        Pomiar czasu faz generacji algorytmu: dla każdej fazy czas rzeczywisty (time.perf_counter),
+        czas procesora bieżącego procesu (time.process_time - bez pracy procesów roboczych ewaluacji)
+        oraz opcjonalnie szczytowe zużycie pamięci przez obiekty Pythona (tracemalloc, track_memory=True;
+        śledzenie alokacji spowalnia obliczenia, dlatego jest domyślnie wyłączone; obejmuje także
+        alokacje wątku zapisu w tle, np. gęstej postaci best.npz).
+        Użycie w pętli: phase('ewaluacja'), phase('selekcja'), ..., end_generation() - każde wywołanie
+        phase kończy poprzednią fazę. Pomiary generacji trafiają do self.log jako słowniki
+        {faza: {'wall': s, 'cpu': s, 'peak_memory': bajty lub None}}.
+    """
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.started_tracing = False
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        self.log = []
+        self.current = None
+        self.times = {}
+
+    def phase(self, name):
+        """
+            Rozpoczęcie fazy name (i zakończenie bieżącej). Czas powtórzonej w generacji fazy jest sumowany.
+        """
+        self._finish()
+        self.current = (name, time.perf_counter(), time.process_time())
+        if self.track_memory:
+            tracemalloc.reset_peak()
+
+    def _finish(self):
+        if self.current is None:
+            return
+        name, wall_start, cpu_start = self.current
+        self.current = None
+        entry = self.times.setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'peak_memory': None})
+        entry['wall'] += time.perf_counter() - wall_start
+        entry['cpu'] += time.process_time() - cpu_start
+        if self.track_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            entry['peak_memory'] = max(entry['peak_memory'] or 0, peak)
+
+    def end_generation(self):
+        """
+            Zakończenie bieżącej fazy i zapis pomiarów generacji do dziennika. Zwraca wpis generacji.
+        """
+        self._finish()
+        entry = self.times
+        self.times = {}
+        self.log.append(entry)
+        return entry
+
+    def close(self):
+        self._finish()
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+
+def format_phase_times(entry):
+    """
+        Krótki opis pomiarów generacji do wypisania na ekran.
+    """
+    parts = []
+    for name, times in entry.items():
+        text = f"{name} {times['wall']:.3f}s/{times['cpu']:.3f}s"
+        if times['peak_memory'] is not None:
+            text += f"/{times['peak_memory'] / 2 ** 20:.1f}MB"
+        parts.append(text)
+    return ", ".join(parts)
@@ -2,7 +2,7 @@ import numpy as np
 import json
 import matplotlib.pyplot as plt
 from collections import defaultdict
-from optimization import create_g_c_mapping, parallel_fitness
+from optimization import create_g_c_mapping, parallel_fitness, compact_to_dense, load_best
 import os
 import re
 
@@ -248,10 +248,11 @@ if __name__ == "__main__":
     
     input_dir = "output"
 
-    best = np.load(f"{input_dir}/best.npz")['best']
+    # postać zwarta (również z plików zawierających tylko postać gęstą) zamieniana na gęstą do wykresów
+    best = compact_to_dense(load_best(f"{input_dir}/best.npz"), len(teachers), len(rooms), len(time_slots))
 
     # extract one individual from original pop
-    # best = np.load(f"{input_dir}/original_population.npz")['population'][...,0]
+    # best = compact_to_dense(np.load(f"{input_dir}/original_population.npz")['population'][0], len(teachers), len(rooms), len(time_slots))
 
     groups_courses_mapping = create_g_c_mapping(course_data, courses)
 